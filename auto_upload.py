@@ -3,51 +3,63 @@ import sys
 import time
 import zipfile
 import re
+import shutil
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from playwright.sync_api import sync_playwright
 
 # ================= 配置区域 =================
 AUTH_FILE = "auth.json"
-# 导入外部配置
-from fetch_rss import HEADLESS, RSS_FEEDS, DOWNLOAD_FOLDER
+# 导入外部配置 (settings 按需读取 config.yaml，不会拉起下载相关的重依赖)
+from fetch_rss import grouped_output, manifest, sanitize_filename
+from settings import settings
+import tracing
+from json_store import JsonStore
+from log_sink import QueuedLogSink, compress_old_logs
+from pacing import Pacer
+from uploaders import UploadFailed, create_uploader
 LOG_DIR = "logs"
 
 
-class Tee:
-    """Write to multiple streams (console + file)."""
-
-    def __init__(self, *streams):
-        self.streams = streams
-
-    def write(self, data):
-        for s in self.streams:
-            s.write(data)
-            s.flush()
-
-    def flush(self):
-        for s in self.streams:
-            s.flush()
-
-
 @contextmanager
 def log_to_file():
     """
     Mirror stdout/stderr to a timestamped log file under LOG_DIR.
-    文件名格式: mm.dd.hh.mm.txt
+    文件名格式: mm.dd.hh.mm.ss-<pid>.txt (同一分钟启动两次也不会冲突)，
+    同名的 .jsonl 是分阶段计时记录 (见 tracing.py)。
+    写入经过后台队列批量 flush，已经结束的运行留下的日志会被 gzip 压缩。
     """
 
     os.makedirs(LOG_DIR, exist_ok=True)
-    timestamp = time.strftime("%m.%d.%H.%M")
-    log_path = os.path.join(LOG_DIR, f"{timestamp}.txt")
-
-    with open(log_path, "w", encoding="utf-8") as f:
-        tee = Tee(sys.stdout, f)
-        old_out, old_err = sys.stdout, sys.stderr
-        sys.stdout = sys.stderr = tee
-        try:
+    stem = f"{time.strftime('%m.%d.%H.%M.%S')}-{os.getpid()}"
+    log_path = os.path.join(LOG_DIR, f"{stem}.txt")
+    compress_old_logs(LOG_DIR)
+    tracing.start_trace(os.path.join(LOG_DIR, f"{stem}.jsonl"))
+
+    sink = QueuedLogSink(
+        sys.stdout,
+        log_path,
+        flush_interval=settings.LOG_FLUSH_INTERVAL,
+        max_bytes=int(settings.LOG_MAX_MB * 1024 * 1024),
+    )
+    old_out, old_err = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = sink
+    try:
+        # 按线程分组输出的路由在这里装一次，下载 / 上传阶段只登记自己线程的缓冲区
+        with grouped_output():
             yield log_path
-        finally:
-            sys.stdout, sys.stderr = old_out, old_err
+    except (SystemExit, KeyboardInterrupt):
+        # 正常的 sys.exit / Ctrl-C 不打印堆栈
+        raise
+    except BaseException:
+        # 崩溃时把异常堆栈也写进日志，再抛出去
+        traceback.print_exc()
+        raise
+    finally:
+        sys.stdout, sys.stderr = old_out, old_err
+        sink.close()
+        tracing.stop_trace()
 
 
 def clean_filename_string(original_name):
@@ -60,298 +72,594 @@ def clean_filename_string(original_name):
     return clean_name
 
 
-def zip_files_flat(file_paths, output_zip_path):
-    """辅助函数：把文件列表打包x'x'x'x成 zip"""
-    print(f"      🗜️ 正在压缩 {len(file_paths)} 个文件...")
-    with zipfile.ZipFile(output_zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
-        for file in file_paths:
-            # zf.write(file, arcname=os.path.basename(file))
-
-            # 1. 原始文件名
-            original_name = os.path.basename(file)
+def title_key(name):
+    """
+    远端标题 / 本地文件名的统一比对 key：
+    去掉扩展名后依次经过 sanitize_filename (下载时的命名规则) 和
+    clean_filename_string (打包上传时的命名规则)，两边用同一套规则才能精确比对。
+    """
+    stem, ext = os.path.splitext(name.strip())
+    if ext.lower() not in {".mp3", ".m4a", ".zip"}:
+        stem = name.strip()
+    return clean_filename_string(sanitize_filename(stem))
 
-            # 2. 清洗文件名 (关键修改)
-            cleaned_name = clean_filename_string(original_name)
 
-            # 3. 写入 ZIP (关键修改: arcname 使用清洗后的名字)
-            zf.write(file, arcname=cleaned_name)
-    return output_zip_path
+def _loose_key(name):
+    """宽松 key：只保留字母数字并转小写，用来发现“只差在清洗规则上”的近似匹配"""
+    return re.sub(r"[^a-z0-9]", "", title_key(name).lower())
 
 
-def run_uploader():
-    if not os.path.exists(AUTH_FILE):
-        print(f"❌ 未找到 {AUTH_FILE}。请先运行登录脚本生成 json 文件。")
-        return
-    upload_summary = []
-    print("🚀 启动浏览器进行上传...")
+class RemoteTitleIndex:
+    """
+    栏目里已有节目标题的索引。
+    远端标题只提取一次，之后每个本地文件都是 O(1) 的集合查询，
+    不会再因为一个标题是另一个标题的子串而误判为已存在。
+    """
 
-    with sync_playwright() as p:
-        # headless 由 config.yaml 控制
-        browser = p.chromium.launch(headless=HEADLESS, slow_mo=1000)
-        context = browser.new_context(storage_state=AUTH_FILE)
-        page = context.new_page()
+    def __init__(self, titles):
+        self.exact = set()
+        self.loose = {}
+        for title in titles:
+            title = title.strip()
+            if not title:
+                continue
+            self.exact.add(title_key(title))
+            self.loose.setdefault(_loose_key(title), title)
+
+    def match(self, filename):
+        """
+        返回 (状态, 远端标题)：
+        - ("exact", key)   规范化后完全一致
+        - ("near", title)  只在大小写 / 标点 / 清洗规则上有差异，需要人工确认
+        - (None, None)     远端没有
+        """
+        key = title_key(filename)
+        if key in self.exact:
+            return "exact", key
+        loose = _loose_key(filename)
+        if loose and loose in self.loose:
+            return "near", self.loose[loose]
+        return None, None
+
+    def __len__(self):
+        return len(self.exact)
+
+
+class RemoteCatalog:
+    """
+    每个栏目已知远端标题的磁盘快照 (记录抓取时间)。
+    快照在 remote_catalog_ttl_hours 内有效时，可以不开浏览器先离线算出哪些栏目真的有文件要上传。
+    """
 
-        try:
-            print("🌍 打开后台管理页面...")
-            page.goto("http://my.eudic.net/Ting/index")
-            page.wait_for_load_state("networkidle")
-
-            # 1. 检查下载主目录是否存在
-            if not os.path.exists(DOWNLOAD_FOLDER):
-                print(
-                    f"❌ 下载主目录 [{DOWNLOAD_FOLDER}] 不存在，无法开始。请先运行 fetch_rss.py 下载音频。"
-                )
+    def __init__(self, path=None):
+        self._store = JsonStore(path, setting="REMOTE_CATALOG_FILE")
+
+    @property
+    def path(self):
+        return self._store.path
+
+    def get(self, channel_name):
+        """返回没过期的标题列表，没有快照或已过期时返回 None"""
+        ttl_s = float(settings.REMOTE_CATALOG_TTL_HOURS or 0) * 3600
+        entry = self._store.load().get(channel_name)
+        if entry is None or time.time() - entry["fetched_at"] > ttl_s:
+            return None
+        return entry["titles"]
+
+    def put(self, channel_name, titles):
+        """用刚从网页 / 接口拿到的完整标题列表替换快照"""
+        unique = sorted({t.strip() for t in titles if t.strip()})
+        with self._store.lock:
+            self._store.load()[channel_name] = {"fetched_at": time.time(), "titles": unique}
+            self._store.save()
+
+    def add(self, channel_name, titles):
+        """上传成功后把新标题补进快照 (不刷新抓取时间)"""
+        with self._store.lock:
+            entry = self._store.load().get(channel_name)
+            if entry is None:
                 return
+            entry["titles"] = sorted(set(entry["titles"]) | set(titles))
+            self._store.save()
 
-            # 2. 扫描主目录下的所有子文件夹 (直接把文件夹名作为频道名)
-            # os.listdir 列出所有文件 -> os.path.isdir 只要文件夹 -> not startswith(".") 过滤隐藏文件
-
-            all_folders = [
-                d
-                for d in os.listdir(DOWNLOAD_FOLDER)
-                if os.path.isdir(os.path.join(DOWNLOAD_FOLDER, d))
-                and not d.startswith(".")
-            ]
-
-            # [关键修改] 自定义排序：让顺序跟 RSS_FEEDS (config.yaml) 保持一致
-            # 1. 拿到配置里的顺序列表
-            priority_list = list(RSS_FEEDS.keys())
-
-            # 2. 定义排序规则函数
-            def custom_sort(folder_name):
-                if folder_name in priority_list:
-                    return priority_list.index(
-                        folder_name
-                    )  # 返回它在配置里的索引(0, 1, 2...)
-                return 999  # 没在配置里的文件夹(手动加的)，统统排在最后
-
-            # 3. 执行排序
-            local_channels = sorted(all_folders, key=custom_sort)
-
-            if not local_channels:
-                print(f"📂 目录 [{DOWNLOAD_FOLDER}] 为空，没有找到任何频道文件夹。")
-                return
 
-            print(
-                f"📂 扫描到本地有 {len(local_channels)} 个频道待处理: {local_channels}"
-            )
+remote_catalog = RemoteCatalog()
 
-            # 初始化计数器
-            upload_ops_count = 0
 
-            # 3. 遍历每个本地频道
-            for channel_name in local_channels:
+# 已经是压缩格式的文件，再 deflate 一遍只会白白耗 CPU
+STORED_EXTENSIONS = {".mp3", ".m4a", ".aac", ".ogg", ".opus", ".zip", ".jpg", ".png"}
+ZIP_COPY_BUFFER = 4 * 1024 * 1024
 
-                local_dir = os.path.join(DOWNLOAD_FOLDER, channel_name)
 
-                print(f"\n{'='*60}")
-                print(f"👀 正在处理栏目: [{channel_name}]")
-                page.wait_for_timeout(2000)  # 稍微停顿
+def zip_files_flat(file_paths, output_zip_path):
+    """
+    辅助函数：把文件列表平铺打包成 zip
+    - 音频等已压缩文件用 ZIP_STORED 直接存储，只有文本类文件才用 deflate
+    - 大块缓冲流式写入，先写临时文件，完成后原子 rename 到 output_zip_path
+    """
+    print(f"      🗜️ 正在打包 {len(file_paths)} 个文件...")
+    started = time.time()
+    tmp_path = output_zip_path + ".part"
+
+    with tracing.span("zip", files=len(file_paths)) as sp:
+        total_bytes = _write_zip(file_paths, output_zip_path, tmp_path)
+        sp["bytes"] = total_bytes
+
+    elapsed = max(time.time() - started, 1e-6)
+    print(
+        f"      ✅ 打包完成: {total_bytes / 1024 / 1024:.1f} MB, "
+        f"{elapsed:.1f}s, {total_bytes / 1024 / 1024 / elapsed:.1f} MB/s"
+    )
+    return output_zip_path
 
-                # 4. 在网页左侧点击栏目
-                try:
-                    page.get_by_text(channel_name, exact=False).first.click()
-                    page.wait_for_timeout(5000)  # 等待右侧刷新
-                except Exception as e:
-                    print(f"  ⚠️  网页上找不到栏目 '{channel_name}'，跳过。")
-                    continue
-
-                # 5. 扫描文件并比对
-                page_content = page.content()
-                all_files = sorted(
-                    [f for f in os.listdir(local_dir) if f.endswith(".mp3")]
-                )
-                files_to_upload = []
-
-                if not all_files:
-                    print("  📂 本地为空，跳过。")
-                    continue
-
-                print(f"  📂 扫描本地文件 ({len(all_files)}个)...")
-                for f in all_files:
-                    file_stem = os.path.splitext(f)[0]
-                    cleaned_stem = clean_filename_string(file_stem)
-                    if (file_stem in page_content) or (cleaned_stem in page_content):
-                        # 简单的包含检查，如果网页源代码里有这个文件名，就当做已存在
-                        print(f"     ⏭️ 已存在:{f}:")
-                    else:
-                        print(f"     🆕待上传:{f}:")
-                        files_to_upload.append(os.path.join(local_dir, f))
-
-                count = len(files_to_upload)
-                if count == 0:
-                    print(f"  ✅ [{channel_name}] 无需更新。")
-                    continue
-
-                # ==================================================
-                # 6. 准备上传流程
-                # ==================================================
-                upload_path = ""
-                is_zip_mode = False
-
-                # 单文件上传：
-                if count == 1:
-                    print("  ⬆️  模式: 单文件上传 (启用AI字幕)")
-                    upload_path = files_to_upload[0]
-
-                    fname_record = os.path.basename(upload_path)
-                    upload_summary.append(f"单文件：[{channel_name}] {fname_record}")
-
-                    # A. 点击上传按钮
-                    print("      1️⃣  点击 [上传听力]...")
-                    page.get_by_role("button", name=re.compile("上传听力")).click()
-
-                    # B. 填入文件
-                    print(f"      2️⃣  填入文件: {os.path.basename(upload_path)}")
-                    page.locator("input[type='file']").set_input_files(upload_path)
-
-                    # C. 等待上传进度条走完
-                    print("      ⏳  等待上传成功提示...")
-
-                    try:
-                        page.get_by_text("上传成功").wait_for(timeout=1800000)
-                    except Exception as e:
-                        # 【如果没等到成功，检查是不是失败了
-                        if (
-                            page.get_by_text("上传失败").is_visible()
-                            or page.get_by_text("失败").is_visible()
-                        ):
-                            print(
-                                f"\n❌❌❌ 严重错误: 文件 [{fname_record}] 上传失败！"
-                            )
-                            print("🛑 停止运行，退出程序。")
-                            sys.exit(1)  # 强制退出
-                        else:
-                            raise e  # 如果不是失败（只是超时），抛出原异常
-
-                    page.wait_for_timeout(1000)  # 稍微停顿
-
-                    print("      ✅  文件传输完成")
-
-                    # D. 点击下一步 (这是去第二页的关键)
-                    print("      3️⃣  点击 [下一步]...")
-                    page.wait_for_timeout(1000)  # 稍微停顿
-                    page.get_by_text("下一步", exact=True).click()
-                    page.wait_for_timeout(1000)  # 稍微停顿
-
-                    # E. 第二页
-                    print("      点击 生成AI字幕")
-                    page.get_by_role("radio", name="生成AI字幕").check()
-                    page.wait_for_timeout(1000)  # 稍微停顿
-
-                    print("      点击 我已阅读并同意")
-                    page.get_by_role("checkbox", name="我已阅读并同意").check()
-                    page.wait_for_timeout(1000)  # 稍微停顿
-
-                    print("      准备点击 [保存] 按钮...")
-                    page.once("dialog", lambda dialog: dialog.accept())
-                    page.get_by_role("button", name="保存").click()
-                    page.wait_for_timeout(3000)  # 稍微停顿
-
-                    print("      捕捉点击 [OK] 按钮...")
-                    page.wait_for_timeout(3000)  # 稍微停顿
-
-                # 多文件上传，打包成 ZIP：
+
+def _write_zip(file_paths, output_zip_path, tmp_path):
+    total_bytes = 0
+    try:
+        with zipfile.ZipFile(tmp_path, "w", allowZip64=True) as zf:
+            for file in file_paths:
+                # 文件名清洗 (关键: arcname 使用清洗后的名字)
+                cleaned_name = clean_filename_string(os.path.basename(file))
+                ext = os.path.splitext(file)[1].lower()
+
+                # from_file 已经填好 file_size，真正超过 4 GB 的文件 zipfile 会自己切换到 Zip64，
+                # 小文件保持普通格式，兼容后台的解压程序
+                zinfo = zipfile.ZipInfo.from_file(file, arcname=cleaned_name)
+                if ext in STORED_EXTENSIONS:
+                    zinfo.compress_type = zipfile.ZIP_STORED
                 else:
-                    print(f"  ⬆️  模式: 批量ZIP上传 ({count} 个文件)")
-                    is_zip_mode = True
+                    zinfo.compress_type = zipfile.ZIP_DEFLATED
 
-                    files_str = ", ".join(
-                        [os.path.basename(f) for f in files_to_upload]
-                    )
-                    upload_summary.append(
-                        f"多文件：[{channel_name}] 共{count}个: {files_str}"
-                    )
+                with open(file, "rb") as src, zf.open(zinfo, "w") as dst:
+                    shutil.copyfileobj(src, dst, ZIP_COPY_BUFFER)
+                total_bytes += zinfo.file_size
+        os.replace(tmp_path, output_zip_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return total_bytes
+
+
+def scan_local_channels():
+    """
+    扫描下载主目录下的所有子文件夹 (直接把文件夹名作为频道名)，
+    按 settings.RSS_FEEDS (config.yaml) 里的顺序排序，没在配置里的文件夹排在最后。
+    """
+    if not os.path.exists(settings.DOWNLOAD_FOLDER):
+        return []
+
+    # os.listdir 列出所有文件 -> os.path.isdir 只要文件夹 -> not startswith(".") 过滤隐藏文件
+    all_folders = [
+        d
+        for d in os.listdir(settings.DOWNLOAD_FOLDER)
+        if os.path.isdir(os.path.join(settings.DOWNLOAD_FOLDER, d)) and not d.startswith(".")
+    ]
+
+    priority_list = list(settings.RSS_FEEDS.keys())
+
+    def custom_sort(folder_name):
+        if folder_name in priority_list:
+            return priority_list.index(folder_name)  # 返回它在配置里的索引(0, 1, 2...)
+        return 999  # 没在配置里的文件夹(手动加的)，统统排在最后
+
+    return sorted(all_folders, key=custom_sort)
+
+
+def _classify_local_files(local_dir, remote_index):
+    """
+    逐个比对本地 mp3，产出 (文件名, 路径, 状态, 对应的远端记录)。状态:
+    - uploaded:     清单记录已上传
+    - same_content: 同一份音频已经以别的标题 / 在别的栏目上传过
+    - exact / near: 远端标题精确 / 近似匹配
+    - new:          待上传
+    """
+    for f in sorted(f for f in os.listdir(local_dir) if f.endswith(".mp3")):
+        path = os.path.join(local_dir, f)
+        if manifest.is_uploaded(path):
+            yield f, path, "uploaded", None
+            continue
+        if settings.SKIP_UPLOADED_CONTENT:
+            same_content = manifest.uploaded_elsewhere(path)
+            if same_content is not None:
+                yield f, path, "same_content", same_content
+                continue
+        status, remote_title = remote_index.match(f)
+        yield f, path, status or "new", remote_title
+
+
+def has_offline_work(channel_name):
+    """
+    不开浏览器，只用清单和远端标题快照判断栏目是否可能有文件要上传。
+    快照不存在或已过期时，只要有清单里没记录为已上传的文件就算有活。
+    """
+    local_dir = os.path.join(settings.DOWNLOAD_FOLDER, channel_name)
+    if not os.path.isdir(local_dir):
+        return False
+    remote_index = RemoteTitleIndex(remote_catalog.get(channel_name) or [])
+    return any(
+        status == "new" for _, _, status, _ in _classify_local_files(local_dir, remote_index)
+    )
 
-                    zip_name = os.path.join(local_dir, "1.zip")
-                    zip_files_flat(files_to_upload, zip_name)
-                    upload_path = zip_name
-
-                    # A. 点击上传按钮
-                    print("      1️⃣  点击 [上传听力]...")
-                    page.get_by_role("button", name=re.compile("上传听力")).click()
-
-                    # B. 填入文件
-                    print(f"      2️⃣  填入文件: {os.path.basename(upload_path)}")
-                    page.locator("input[type='file']").set_input_files(upload_path)
-
-                    # C. 等待上传进度条走完
-                    print("      ⏳  等待上传成功提示...")
-
-                    try:
-                        # 尝试等待“上传成功”，超时设置为30分钟
-                        page.get_by_text("上传成功").wait_for(timeout=1800000)
-                    except Exception as e:
-                        # 如果没等到成功，检查是不是失败了
-                        if (
-                            page.get_by_text("上传失败").is_visible()
-                            or page.get_by_text("失败").is_visible()
-                        ):
-                            print(
-                                f"\n❌❌❌ 严重错误: 文件 [{fname_record}] 上传失败！"
-                            )
-                            print("🛑 停止运行，退出程序。")
-                            sys.exit(1)  # 强制退出
-                        else:
-                            raise e  # 如果不是失败（只是超时），抛出原异常
-
-                    page.wait_for_timeout(1000)  # 稍微停顿
-                    print("      ✅  文件传输完成")
-
-                    # D. 点击下一步 (这是去第二页的关键)
-                    print("      3️⃣  点击 [下一步]...")
-                    page.wait_for_timeout(1000)  # 稍微停顿
-                    page.get_by_text("下一步", exact=True).click()
-                    page.wait_for_timeout(1000)  # 稍微停顿
-
-                    # E. 第二页
-                    print("      点击 我已阅读并同意")
-                    page.get_by_role("checkbox", name="我已阅读并同意").check()
-                    page.wait_for_timeout(1000)  # 稍微停顿
-
-                    print("      准备点击 [保存] 按钮...")
-                    page.get_by_role("button", name="保存").click()
-                    page.wait_for_timeout(1000)  # 稍微停顿
-
-                    print("      准备点击 [确定] 按钮...")
-                    # page.once("dialog", lambda dialog: dialog.accept())
-                    page.get_by_text("确定").click()
-                    page.wait_for_timeout(1000)  # 稍微停顿
-
-                    # ==================================================
-                    # 7. 收尾：刷新页面
-                    # ==================================================
-                print("      🔄  刷新页面，准备下一轮...")
-                page.reload()
-                page.wait_for_load_state("networkidle")
-                page.wait_for_timeout(1000)  # 稍微停顿
-
-                upload_ops_count += 1
-                print(f"上传动作计数，目前已上传{upload_ops_count}次:")
-                if upload_ops_count % 2 == 0:
-                    print(
-                        f"☕ 已连续上传 2 次 (累计{upload_ops_count}次)，休息 5 分钟以缓解网页拥堵..."
+
+def _collect_pending(uploader, channel_name, local_dir, near_miss_summary):
+    """
+    比对本地文件和栏目里已有的标题，返回待上传文件列表。
+    本地没有 mp3 时返回空列表。
+    """
+    # 远端标题只提取一次，建成索引，同时刷新本地快照
+    with tracing.span("remote_titles") as sp:
+        titles = uploader.remote_titles()
+        remote_catalog.put(channel_name, titles)
+        remote_index = RemoteTitleIndex(titles)
+        sp["titles"] = len(remote_index)
+    classified = list(_classify_local_files(local_dir, remote_index))
+    files_to_upload = []
+
+    if not classified:
+        print("  📂 本地为空，跳过。")
+        return files_to_upload
+
+    print(f"  📂 扫描本地文件 ({len(classified)}个)...")
+    already_remote = []
+    for f, path, status, remote in classified:
+        if status == "uploaded":
+            print(f"     ⏭️ 清单记录已上传:{f}:")
+        elif status == "same_content":
+            print(f"     ⏭️ 内容已上传:{f}: = [{remote['feed']}] {remote['title']}")
+            already_remote.append(path)
+        elif status == "exact":
+            print(f"     ⏭️ 已存在:{f}:")
+            already_remote.append(path)
+        elif status == "near":
+            # 近似匹配：大概率是同一集，先跳过，汇总里列出来人工确认
+            print(f"     ❓ 近似匹配，跳过:{f}: ≈ {remote}")
+            near_miss_summary.append(f"[{channel_name}] {f} ≈ {remote}")
+        else:
+            print(f"     🆕待上传:{f}:")
+            files_to_upload.append(path)
+
+    manifest.mark_uploaded(already_remote)
+    return files_to_upload
+
+
+class _UploadResults:
+    """所有上传线程共享的结果：汇总报告、近似匹配、节奏统计、失败标记"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.upload_summary = []
+        self.near_miss_summary = []
+        self.pacer = Pacer(settings.PACING)
+        self.upload_ops_count = 0
+        self.failed = False
+
+
+def _process_channel(uploader, channel_name, results):
+    """处理单个栏目：点击栏目 -> 比对 -> 上传 -> 刷新"""
+    with tracing.context(channel=channel_name):
+        _process_channel_inner(uploader, channel_name, results)
+
+
+def _process_channel_inner(uploader, channel_name, results):
+    local_dir = os.path.join(settings.DOWNLOAD_FOLDER, channel_name)
+    if not os.path.isdir(local_dir):
+        print(f"  ⚠️  本地没有栏目目录 [{channel_name}]，跳过。")
+        return
+
+    print(f"\n{'='*60}")
+    print(f"👀 正在处理栏目: [{channel_name}]")
+    uploader.pacer.cooldown()  # 只有服务器变慢时才会真正休息
+
+    # 4. 切换到栏目 (网页后端: 点击左侧栏目并等待右侧刷新)
+    with tracing.span("channel_click") as sp:
+        found = uploader.select_channel(channel_name)
+        sp["outcome"] = "ok" if found else "not_found"
+    if not found:
+        print(f"  ⚠️  无法进入栏目 '{channel_name}' (找不到或列表没有刷新)，跳过。")
+        return
+
+    # 5. 扫描文件并比对
+    near_misses = []
+    files_to_upload = _collect_pending(uploader, channel_name, local_dir, near_misses)
+    with results.lock:
+        results.near_miss_summary.extend(near_misses)
+
+    count = len(files_to_upload)
+    if count == 0:
+        print(f"  ✅ [{channel_name}] 无需更新。")
+        return
+
+    # 6. 上传 (多文件时按大小 / 个数上限分批打包，打包下一批和上传当前批同时进行)
+    try:
+        _upload_chunks(uploader, channel_name, local_dir, files_to_upload, results)
+    except UploadFailed as e:
+        print(f"\n❌❌❌ 严重错误: 文件 [{e}] 上传失败！")
+        with results.lock:
+            results.failed = True
+        return
+
+    # 7. 收尾：刷新页面
+    with tracing.span("refresh"):
+        uploader.refresh()
+
+
+def plan_chunks(file_paths, max_bytes, max_files):
+    """
+    按大小和个数上限把文件顺序切成若干批；max_bytes / max_files 为 0 表示不限制。
+    单个文件超过大小上限时自成一批。
+    """
+    chunks, current, current_bytes = [], [], 0
+    for path in file_paths:
+        size = os.path.getsize(path)
+        full = (max_files and len(current) >= max_files) or (
+            max_bytes and current and current_bytes + size > max_bytes
+        )
+        if full:
+            chunks.append(current)
+            current, current_bytes = [], 0
+        current.append(path)
+        current_bytes += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _pack_chunk(chunk, local_dir, stamp, index, trace_attrs):
+    """打包一批文件 (在打包线程里执行)；只有一个文件时直接单文件上传，不打包"""
+    if len(chunk) == 1:
+        return chunk[0]
+    with tracing.context(**trace_attrs):
+        zip_path = os.path.join(local_dir, f"upload-{stamp}-{index + 1}.zip")
+        return zip_files_flat(chunk, zip_path)
+
+
+def _upload_chunk(uploader, channel_name, upload_path, attempt):
+    """上传一批；重试前先刷新页面并重新选中栏目，保证页面状态干净"""
+    if attempt:
+        print(f"  🔁 第 {attempt} 次重试: {os.path.basename(upload_path)}")
+        uploader.pacer.record_error()
+        uploader.pacer.cooldown()
+        uploader.refresh()
+        if not uploader.select_channel(channel_name):
+            raise UploadFailed(os.path.basename(upload_path))
+    if upload_path.endswith(".zip"):
+        uploader.upload_zip(upload_path)
+    else:
+        uploader.upload_single(upload_path)
+
+
+def _upload_chunks(uploader, channel_name, local_dir, files_to_upload, results):
+    """
+    分批上传 files_to_upload，每成功一批就记入清单和上传汇总。
+    - 每批不超过 zip_max_mb / zip_max_files (config.yaml)
+    - 后台线程打包第 N+1 批的同时，上传第 N 批 (Playwright 只能在当前线程里操作)
+    - 某一批失败只重试这一批 (最多 chunk_retries 次)，之前成功的批次已经记入清单
+    """
+    chunks = plan_chunks(
+        files_to_upload,
+        int(settings.ZIP_MAX_MB * 1024 * 1024),
+        int(settings.ZIP_MAX_FILES),
+    )
+    if len(chunks) == 1 and len(chunks[0]) == 1:
+        print("  ⬆️  模式: 单文件上传 (启用AI字幕)")
+    elif len(chunks) == 1:
+        print(f"  ⬆️  模式: 批量ZIP上传 ({len(files_to_upload)} 个文件)")
+    else:
+        print(f"  ⬆️  模式: 分 {len(chunks)} 批上传 ({len(files_to_upload)} 个文件)")
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    trace_attrs = {"channel": channel_name}
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="zip") as packer:
+        pending = packer.submit(_pack_chunk, chunks[0], local_dir, stamp, 0, trace_attrs)
+        try:
+            for index, chunk in enumerate(chunks):
+                upload_path = pending.result()
+                pending = None
+                if index + 1 < len(chunks):
+                    pending = packer.submit(
+                        _pack_chunk, chunks[index + 1], local_dir, stamp, index + 1, trace_attrs
                     )
-                    time.sleep(300)
-                    print("⏰ 休息结束，准备处理下一个...")
-                    # 休息久了防止页面状态失效，保险起见再刷一次
-                    page.reload()
-                    page.wait_for_load_state("networkidle")
+                try:
+                    _upload_chunk_with_retry(uploader, channel_name, upload_path)
+                finally:
+                    if upload_path.endswith(".zip") and os.path.exists(upload_path):
+                        os.remove(upload_path)
+
+                manifest.mark_uploaded(chunk)
+                remote_catalog.add(channel_name, [os.path.basename(f) for f in chunk])
+                names = ", ".join(os.path.basename(f) for f in chunk)
+                if len(chunk) == 1:
+                    summary = f"单文件：[{channel_name}] {names}"
+                else:
+                    summary = f"多文件：[{channel_name}] 共{len(chunk)}个: {names}"
+                with results.lock:
+                    results.upload_summary.append(summary)
+                    results.upload_ops_count += 1
+                    ops = results.upload_ops_count
+                print(f"上传动作计数，目前已上传{ops}次:")
+                if pending is not None:
+                    # 下一批要重新进入栏目的上传页
+                    uploader.refresh()
+                    if not uploader.select_channel(channel_name):
+                        raise UploadFailed(channel_name)
+        finally:
+            # 中途失败时，已经提前打好的下一批不再需要
+            if pending is not None:
+                try:
+                    leftover = pending.result()
+                    if leftover.endswith(".zip") and os.path.exists(leftover):
+                        os.remove(leftover)
+                except Exception:
+                    pass
 
+
+def _upload_chunk_with_retry(uploader, channel_name, upload_path):
+    retries = max(int(settings.CHUNK_RETRIES or 0), 0)
+    for attempt in range(retries + 1):
+        try:
+            _upload_chunk(uploader, channel_name, upload_path, attempt)
+            return
+        except UploadFailed:
+            if attempt >= retries:
+                raise
         except Exception as e:
-            print(f"❌ 脚本崩溃: {e}")
-        finally:
-            context.close()
-            browser.close()
-
-            print("\n" + "=" * 50)
-            print("📊 本次上传汇总报告:")
-            if not upload_summary:
-                print("   (本次没有上传任何新文件)")
-            else:
-                for i, msg in enumerate(upload_summary, 1):
-                    print(f"   {i}. {msg}\n")
-            print("=" * 50 + "\n")
-
-            print("\n🏁 程序退出。")
+            # 超时等非“上传失败”提示的错误也只重试这一批
+            if attempt >= retries:
+                raise UploadFailed(os.path.basename(upload_path)) from e
+            print(f"  ⚠️ 上传出错: {e}")
+
+
+def _channel_feeder(channels, results):
+    """
+    把栏目列表 / 流水线迭代器包装成线程安全的 next_channel()，出现失败后不再分发。
+    离线判断没有待上传文件的栏目直接跳过，不占用浏览器。
+    """
+    it = iter(channels)
+    lock = threading.Lock()
+
+    def next_channel():
+        with lock:
+            while not results.failed:
+                channel_name = next(it, None)
+                if channel_name is None or has_offline_work(channel_name):
+                    return channel_name
+                print(f"⏭️ [{channel_name}] 离线比对无新文件，跳过 (不打开浏览器)")
+            return None
+
+    return next_channel
+
+
+def _upload_worker(next_channel, results, router=None):
+    """
+    一个上传工作者：自己的上传后端 (Playwright 时是独立的浏览器 + 由 AUTH_FILE 创建的上下文)，
+    从共享队列里领取栏目逐个处理。router 不为空时按栏目分组输出日志。
+    """
+    pacer = Pacer(settings.PACING)
+    uploader = None
+    try:
+        while True:
+            channel_name = next_channel()
+            if channel_name is None:
+                break
+            if uploader is None:
+                # 第一次真的有活时才启动浏览器 / 建立会话
+                uploader = create_uploader(
+                    settings.UPLOAD_BACKEND,
+                    AUTH_FILE,
+                    pacer,
+                    headless=settings.HEADLESS,
+                    http_options=settings.HTTP_UPLOAD,
+                    browser_service=settings.BROWSER_SERVICE,
+                )
+                uploader.open()
+            if router is None:
+                _process_channel(uploader, channel_name, results)
+                continue
+            text, error = router.run_captured(
+                _process_channel, uploader, channel_name, results
+            )
+            with results.lock:
+                router.target.write(text)
+                router.target.flush()
+            if error is not None:
+                # 栏目处理中途出错，页面状态不可信，刷新后继续下一个
+                pacer.record_error()
+                uploader.refresh()
+    except Exception as e:
+        pacer.record_error()
+        print(f"❌ 脚本崩溃: {e}")
+    finally:
+        if uploader is not None:
+            uploader.close()
+        with results.lock:
+            results.pacer.merge(pacer)
+
+
+def run_uploader(channels=None):
+    """
+    上传入口
+    - channels: 要处理的栏目名 (可迭代对象)。不传则扫描 settings.DOWNLOAD_FOLDER 下的全部栏目；
+      流水线模式下传入一个“下载完一个栏目就产出一个栏目名”的迭代器。
+    - upload_workers (config.yaml) > 1 时，多个浏览器上下文并行处理不同栏目。
+    - upload_backend (config.yaml) 选择上传后端: playwright (默认) 或 http。
+    """
+    if not os.path.exists(AUTH_FILE):
+        print(f"❌ 未找到 {AUTH_FILE}。请先运行登录脚本生成 json 文件。")
+        return
+
+    if channels is None:
+        # 1. 检查下载主目录是否存在
+        if not os.path.exists(settings.DOWNLOAD_FOLDER):
+            print(
+                f"❌ 下载主目录 [{settings.DOWNLOAD_FOLDER}] 不存在，无法开始。请先运行 fetch_rss.py 下载音频。"
+            )
+            return
+
+        # 2. 扫描主目录下的所有子文件夹 (直接把文件夹名作为频道名)
+        channels = scan_local_channels()
+
+        if not channels:
+            print(f"📂 目录 [{settings.DOWNLOAD_FOLDER}] 为空，没有找到任何频道文件夹。")
+            return
+
+        print(f"📂 扫描到本地有 {len(channels)} 个频道待处理: {channels}")
+
+    if isinstance(channels, list):
+        # 先离线比对，全部栏目都没有新文件时直接结束，不启动浏览器
+        with tracing.span("offline_check", channels=len(channels)) as sp:
+            channels = [c for c in channels if has_offline_work(c)]
+            sp["pending_channels"] = len(channels)
+        if not channels:
+            print("✅ 离线比对: 所有栏目都没有待上传文件，不启动浏览器。")
+            return
+        print(f"🔎 离线比对: {len(channels)} 个栏目可能有新文件: {channels}")
+
+    workers = max(int(settings.UPLOAD_WORKERS or 1), 1)
+    if isinstance(channels, list):
+        workers = min(workers, len(channels))
+
+    results = _UploadResults()
+    next_channel = _channel_feeder(channels, results)
+    print(f"🚀 开始上传 (后端: {settings.UPLOAD_BACKEND})...")
+
+    try:
+        # 3. 遍历每个本地频道
+        if workers == 1:
+            _upload_worker(next_channel, results)
+        else:
+            print(f"⚡ 并发上传: {workers} 个浏览器上下文同时处理不同栏目")
+            with grouped_output() as router:
+                threads = [
+                    threading.Thread(
+                        target=_upload_worker,
+                        args=(next_channel, results, router),
+                        name=f"upload-{i}",
+                    )
+                    for i in range(workers)
+                ]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+    finally:
+        print("\n" + "=" * 50)
+        print("📊 本次上传汇总报告:")
+        if not results.upload_summary:
+            print("   (本次没有上传任何新文件)")
+        else:
+            for i, msg in enumerate(results.upload_summary, 1):
+                print(f"   {i}. {msg}\n")
+        if results.near_miss_summary:
+            print("❓ 近似匹配 (已跳过，请人工确认是否已上传):")
+            for msg in results.near_miss_summary:
+                print(f"   - {msg}")
+        print(f"⏱️ {results.pacer.summary()}")
+        print("=" * 50 + "\n")
+
+        print("\n🏁 程序退出。")
+
+    if results.failed:
+        print("🛑 有文件上传失败，停止运行，退出程序。")
+        sys.exit(1)  # 强制退出
     print("✅任务完成。")
@@ -0,0 +1,308 @@
+"""
+下载链路离线基准测试
+====================
+在本机起一个 HTTP 服务，提供合成的 RSS feed (条目数可配) 和假 MP3 (大小、延迟可配，支持 Range)，
+然后对 parse_rss / download_audios / fetch_rss_main 计时，输出:
+
+- parse:    每秒解析条目数
+- download: 下载吞吐 MB/s
+- fetch:    fetch_rss_main 整体每秒处理 feed 数
+- 每个阶段结束时的进程峰值内存 (peak RSS)
+
+结果保存为 JSON，方便和之前的运行对比:
+    python bench_fetch.py
+    python bench_fetch.py --items 10 1000 10000 --audio-kb 2048 --latency-ms 100
+    python bench_fetch.py --compare bench_results/fetch-20250101-120000.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fetch_rss
+from settings import settings
+
+BENCH_YEAR = 2024
+
+
+# ================= 本地 feed / 音频服务 =================
+
+
+def build_feed(base_url, feed_id, items):
+    """生成按发布时间倒序排列的 RSS，条目日期都落在 BENCH_YEAR 年内"""
+    start = datetime(BENCH_YEAR, 12, 31, 8, 0, tzinfo=timezone.utc)
+    step = timedelta(minutes=max(525600 // max(items, 1) - 1, 1))
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">',
+        f"<channel><title>Bench Feed {feed_id}</title><ttl>60</ttl>",
+    ]
+    for i in range(items):
+        pub = format_datetime(start - step * i)
+        parts.append(
+            f"<item><title>Bench episode {feed_id}-{i}: a synthetic title</title>"
+            f"<guid>bench-{feed_id}-{i}</guid><pubDate>{pub}</pubDate>"
+            f"<description>Synthetic summary for episode {i}. " + "x" * 200 + "</description>"
+            f"<itunes:duration>00:06:{i % 60:02d}</itunes:duration>"
+            f'<enclosure url="{base_url}/audio/{feed_id}-{i}.mp3" type="audio/mpeg" /></item>'
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode("utf-8")
+
+
+def make_handler(options):
+    feeds = {}
+    lock = threading.Lock()
+    blocks = {}
+    salt = os.urandom(8)
+
+    def audio_block(path):
+        """每个文件一块不同的 64 KB 伪随机数据，文件内容按偏移循环取，Range 请求能拿到正确的字节"""
+        with lock:
+            block = blocks.get(path)
+            if block is None:
+                seed = salt + path.encode()
+                block = blocks[path] = b"".join(
+                    hashlib.sha256(seed + i.to_bytes(4, "big")).digest() for i in range(2048)
+                )
+            return block
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_HEAD(self):
+            self._serve(head=True)
+
+        def do_GET(self):
+            self._serve(head=False)
+
+        def _serve(self, head):
+            if options["latency_ms"]:
+                time.sleep(options["latency_ms"] / 1000)
+            m = re.fullmatch(r"/feed/(\d+)/(\d+)\.rss", self.path)
+            if m:
+                key = (int(m.group(1)), int(m.group(2)))
+                with lock:
+                    if key not in feeds:
+                        base = f"http://{self.headers['Host']}"
+                        feeds[key] = build_feed(base, key[0], key[1])
+                    body = feeds[key]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/rss+xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+                return
+            if self.path.startswith("/audio/"):
+                return self._serve_audio(head)
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def _serve_audio(self, head):
+            size = options["audio_bytes"]
+            start, end = 0, size - 1
+            rng = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            if rng:
+                start = int(rng.group(1))
+                end = int(rng.group(2)) if rng.group(2) else size - 1
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.end_headers()
+            if head:
+                return
+            block = audio_block(self.path)
+            pos, left = start, end - start + 1
+            while left > 0:
+                offset = pos % len(block)
+                chunk = block[offset : offset + left]
+                self.wfile.write(chunk)
+                pos += len(chunk)
+                left -= len(chunk)
+
+    return Handler
+
+
+def start_server(options):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(options))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# ================= 计时工具 =================
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位是 KB，macOS 是字节
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def isolate(workdir):
+    """
+    把下载目录、feed 缓存、清单都指向临时目录，避免污染真实数据；
+    关掉内容去重，每一集都走真实的下载路径
+    """
+    settings.override(DOWNLOAD_FOLDER=os.path.join(workdir, "download"), CONTENT_DEDUPE="off")
+    fetch_rss.feed_cache = fetch_rss.FeedCache(os.path.join(workdir, "feed_cache.json"))
+    fetch_rss.manifest = fetch_rss.Manifest(os.path.join(workdir, "manifest.db"))
+
+
+def bench_parse(base_url, item_counts, repeat, workdir):
+    results = []
+    for items in item_counts:
+        timings = []
+        for r in range(repeat):
+            isolate(workdir)  # 每轮都用空缓存，测的是完整下载 + 解析
+            url = f"{base_url}/feed/{r}/{items}.rss"
+            started = time.perf_counter()
+            rows = fetch_rss.parse_rss(url)
+            timings.append(time.perf_counter() - started)
+            assert len(rows) == items, f"解析出 {len(rows)} 条，期望 {items}"
+        best = min(timings)
+        results.append(
+            {
+                "items": items,
+                "best_s": round(best, 4),
+                "items_per_s": round(items / best, 1),
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+            }
+        )
+        print(f"  parse {items:>6} 条: {best * 1000:>9.1f} ms  {items / best:>10.0f} 条/秒")
+    return results
+
+
+def bench_download(base_url, episodes, audio_bytes, workdir):
+    isolate(workdir)
+    rows = fetch_rss.parse_rss(f"{base_url}/feed/9000/{episodes}.rss")
+    started = time.perf_counter()
+    fetch_rss.download_audios(rows, "bench", BENCH_YEAR, BENCH_YEAR, episodes)
+    elapsed = time.perf_counter() - started
+    folder = os.path.join(settings.DOWNLOAD_FOLDER, "bench")
+    done = [f for f in os.listdir(folder) if f.endswith(".mp3")]
+    total_mb = len(done) * audio_bytes / 1024 / 1024
+    result = {
+        "episodes": len(done),
+        "total_mb": round(total_mb, 1),
+        "seconds": round(elapsed, 3),
+        "mb_per_s": round(total_mb / elapsed, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    print(f"  download {len(done)} 集 / {total_mb:.1f} MB: {elapsed:.2f}s  {total_mb / elapsed:.1f} MB/s")
+    return result
+
+
+def bench_fetch_main(base_url, feeds, items, latest_num, workdir):
+    isolate(workdir)
+    target = {f"Bench {i}": f"{base_url}/feed/{100 + i}/{items}.rss" for i in range(feeds)}
+    started = time.perf_counter()
+    fetch_rss.fetch_rss_main(
+        target_feeds=target,
+        year_from=BENCH_YEAR,
+        year_end=BENCH_YEAR,
+        latest_num=latest_num,
+        clean_folder=True,
+    )
+    elapsed = time.perf_counter() - started
+    result = {
+        "feeds": feeds,
+        "items_per_feed": items,
+        "latest_num": latest_num,
+        "seconds": round(elapsed, 3),
+        "feeds_per_s": round(feeds / elapsed, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    print(f"  fetch_rss_main {feeds} 个 feed: {elapsed:.2f}s  {feeds / elapsed:.2f} feed/秒")
+    return result
+
+
+def compare(current, previous_path):
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\n与 {previous_path} 对比 (>1 表示变快):")
+    prev_parse = {r["items"]: r for r in previous.get("parse", [])}
+    for r in current["parse"]:
+        old = prev_parse.get(r["items"])
+        if old:
+            print(f"  parse {r['items']:>6} 条: {r['items_per_s'] / old['items_per_s']:.2f}x")
+    for key, metric in (("download", "mb_per_s"), ("fetch", "feeds_per_s")):
+        if previous.get(key):
+            ratio = current[key][metric] / previous[key][metric]
+            print(f"  {key:<8}: {ratio:.2f}x")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="下载链路离线基准测试")
+    ap.add_argument("--items", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    ap.add_argument("--repeat", type=int, default=3, help="parse 每个规模跑几轮取最好成绩")
+    ap.add_argument("--feeds", type=int, default=10, help="fetch_rss_main 阶段的 feed 数")
+    ap.add_argument("--episodes", type=int, default=10, help="每个 feed 下载几集")
+    ap.add_argument("--audio-kb", type=int, default=1024, help="假 MP3 大小 (KB)")
+    ap.add_argument("--latency-ms", type=int, default=50, help="每个请求的人为延迟 (毫秒)")
+    ap.add_argument(
+        "--parser", choices=["feedparser", "stream"], default=None,
+        help="feed 解析方式 (默认沿用 config.yaml 的 feed_parser)",
+    )
+    ap.add_argument("--out", default="bench_results", help="结果 JSON 保存目录")
+    ap.add_argument("--compare", help="和之前保存的结果 JSON 对比")
+    args = ap.parse_args()
+
+    if args.parser:
+        settings.override(FEED_PARSER=args.parser)
+    options = {"audio_bytes": args.audio_kb * 1024, "latency_ms": args.latency_ms}
+    server, base_url = start_server(options)
+    workdir = tempfile.mkdtemp(prefix="bench_fetch_")
+    try:
+        print(f"🧪 本地 feed 服务: {base_url}  (延迟 {args.latency_ms} ms)")
+        results = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "options": vars(args),
+        }
+        print("\n[parse_rss]")
+        results["parse"] = bench_parse(base_url, args.items, args.repeat, workdir)
+        print("\n[download_audios]")
+        results["download"] = bench_download(
+            base_url, args.episodes, options["audio_bytes"], workdir
+        )
+        print("\n[fetch_rss_main]")
+        results["fetch"] = bench_fetch_main(
+            base_url, args.feeds, args.episodes, args.episodes, workdir
+        )
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"fetch-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 结果已保存: {out_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
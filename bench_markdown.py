@@ -0,0 +1,165 @@
+"""
+HTML -> Markdown 输出一致性检查 + 计时
+====================================
+对比 get_article_from_bbc 的两套转换引擎:
+- classic: 递归的 _node_to_md (html.parser)
+- fast:    只解析 featuresubheader / rich-text 两个 widget (SoupStrainer)，显式栈迭代转换，直接流式写出
+           (默认 html.parser，lxml 需要显式指定)
+
+页面来源: golden/bbc_markdown/*.html (包含未闭合 <p>、<p> 里套块元素、CRLF、实体等不规范写法；
+episode_layout 按 6 Minute English 页面的结构重建：head 里的脚本/样式、导航、相关剧集列表、页脚)
+加上一个合成的大页面；--pages 可以换成自己保存的 BBC 页面。
+- classic 和 fast (html.parser) 的输出都必须和 golden 文件 (<页面名>.md) 完全一致，否则退出码为 1；
+  golden 不存在也算失败，只有加 --update-golden 才会用 classic 的输出 (重新) 生成
+- lxml 只做参考：它对不规范 HTML 建出来的树不同，输出不一致是预期内的，只打印提示
+- 解析占了大部分时间；整页里正文只占一小部分，所以 fast 在完整页面上明显更快，
+  合成页面几乎全是正文，两者差不多
+- tests/test_markdown_golden.py 做同样的 golden 比对 (不计时)
+
+用法:
+    python bench_markdown.py
+    python bench_markdown.py --pages saved/*.html --golden golden_md
+    python bench_markdown.py --paragraphs 20000 --repeat 5
+    python bench_markdown.py --pages new_page.html --update-golden
+"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+import warnings
+
+import get_article_from_bbc as gab
+
+GOLDEN_DIR = os.path.join("golden", "bbc_markdown")
+
+
+def synthetic_page(paragraphs):
+    """生成类似 6 Minute English 的页面：标题、副标题、带各种加粗写法的正文"""
+    body = []
+    for i in range(paragraphs):
+        kind = i % 6
+        if kind == 0:
+            body.append(f"<h3>Section {i} <strong>key_words</strong></h3>")
+        elif kind == 1:
+            body.append(
+                f"<p><b>Neil</b><br/>Hello, this is paragraph {i} with snake_case words "
+                f'and <span class="text-bold">styled bold</span> text.</p>'
+            )
+        elif kind == 2:
+            body.append(
+                f'<p><span style="font-weight: bold"> Beth </span><br>Reply {i}: '
+                f"<em>nested <strong>bold <b>inside</b> bold</strong></em> and a "
+                f'<a href="/x_{i}">link_{i}</a>.</p>'
+            )
+        elif kind == 3:
+            body.append(
+                "<ul>" + "".join(f"<li>item {i}-{j} <b> _ </b></li>" for j in range(3)) + "</ul>"
+            )
+        elif kind == 4:
+            body.append(f"<hr/><p>  <strong> </strong>plain text {i}<!-- comment {i} --></p>")
+        else:
+            body.append(f'<div class="wrapper"><p class="Bold">Vocabulary {i}</p></div>')
+    return (
+        "<html><head><title>BBC Learning English - 6 Minute English / Synthetic_Episode"
+        "</title></head><body>"
+        '<div class="widget widget-bbcle-featuresubheader"><h3>Episode 250612 / 12 Jun 2025</h3></div>'
+        '<div class="widget widget-richtext 6">' + "\n".join(body) + "</div></body></html>"
+    )
+
+
+def best_time(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def fast_to_string(html, parser):
+    buf = io.StringIO()
+    gab.render_article_fast(html, out=buf, parser=parser)
+    return buf.getvalue()
+
+
+def has_lxml():
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        print("(未安装 lxml，只测 html.parser)")
+        return False
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser(description="HTML -> Markdown 引擎基准测试")
+    ap.add_argument("--pages", nargs="*", help=f"BBC 页面 (.html)，默认 {GOLDEN_DIR}/*.html")
+    ap.add_argument("--paragraphs", type=int, default=5000, help="合成页面的段落数")
+    ap.add_argument("--repeat", type=int, default=3, help="每种引擎跑几轮取最好成绩")
+    ap.add_argument("--golden", default=GOLDEN_DIR, help="golden Markdown 目录")
+    ap.add_argument(
+        "--update-golden", action="store_true", help="用 classic 的输出写入 golden (先人工确认输出无误)"
+    )
+    args = ap.parse_args()
+
+    paths = args.pages
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(GOLDEN_DIR, "*.html")))
+    pages = []
+    for path in paths:
+        with open(path, "rb") as f:
+            pages.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+    if not args.pages:
+        pages.append((f"synthetic-{args.paragraphs}", synthetic_page(args.paragraphs).encode()))
+
+    with_lxml = has_lxml()
+    ok = True
+    for name, html in pages:
+        print(f"\n📄 {name} ({len(html) / 1024:.0f} KB)")
+        classic_s, (expected, _) = best_time(lambda: gab.render_article(html), args.repeat)
+        print(f"  classic (html.parser): {classic_s * 1000:>8.1f} ms")
+
+        # 合成页面只比对 classic 和 fast，不落 golden 文件
+        if args.golden and not name.startswith("synthetic-"):
+            golden_path = os.path.join(args.golden, f"{name}.md")
+            if args.update_golden:
+                os.makedirs(args.golden, exist_ok=True)
+                with open(golden_path, "w", encoding="utf-8", newline="") as f:
+                    f.write(expected)
+                print(f"  💾 已写入 golden: {golden_path}")
+            elif not os.path.exists(golden_path):
+                print(f"  ❌ 缺少 golden: {golden_path} (确认输出后用 --update-golden 生成)")
+                ok = False
+            else:
+                with open(golden_path, "r", encoding="utf-8", newline="") as f:
+                    if f.read() != expected:
+                        print(f"  ❌ classic 输出和 golden 不一致: {golden_path}")
+                        ok = False
+
+        fast_s, output = best_time(lambda: fast_to_string(html, "html.parser"), args.repeat)
+        same = output == expected
+        ok = ok and same
+        print(
+            f"  fast    (html.parser): {fast_s * 1000:>8.1f} ms  "
+            f"{classic_s / fast_s:>5.2f}x  {'✅ 输出一致' if same else '❌ 输出不一致'}"
+        )
+
+        if with_lxml:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                lxml_s, output = best_time(lambda: fast_to_string(html, "lxml"), args.repeat)
+            print(
+                f"  fast    (lxml       ): {lxml_s * 1000:>8.1f} ms  {classic_s / lxml_s:>5.2f}x  "
+                f"{'✅ 输出一致' if output == expected else '⚠️  输出不同 (lxml 的树结构不同，仅供参考)'}"
+            )
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+启动耗时基准测试
+================
+用 `python -X importtime` 在子进程里测量各种运行方式“开始干活之前”的导入耗时，
+并列出实际被加载的重依赖 (pandas / feedparser / requests / dateutil / yaml / playwright)。
+
+场景:
+- fetch-only:  main + fetch_rss + 下载阶段真正用到的依赖
+- upload-only: main + auto_upload (上传阶段不再拉起 pandas / feedparser)
+- full:        两个阶段都跑
+每个场景再测一次 "legacy" 版本：模拟旧代码在导入时就把全部重依赖一次性加载，方便对比收益。
+
+用法:
+    python bench_startup.py
+    python bench_startup.py --repeat 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ["pandas", "feedparser", "requests", "dateutil", "yaml", "playwright"]
+
+# 下载阶段开始后才会用到的依赖 (fetch_rss 里是在函数内导入的)
+FETCH_DEPS = ["requests", "feedparser", "dateutil.parser", "pandas"]
+
+SCENARIOS = {
+    "fetch-only": ["main", "fetch_rss", "settings:raw"] + FETCH_DEPS,
+    "upload-only": ["main", "auto_upload", "settings:raw"],
+    "full": ["main", "fetch_rss", "auto_upload", "settings:raw"] + FETCH_DEPS,
+}
+
+# 旧代码: 任何一个入口都会经 fetch_rss 在导入时加载这些依赖并读取 config.yaml
+LEGACY_EAGER = ["requests", "feedparser", "pandas", "yaml", "dateutil.parser", "settings:raw"]
+
+
+def build_code(targets):
+    """生成子进程执行的代码；装不上的依赖跳过，不影响其余部分的计时"""
+    lines = ["import importlib"]
+    for target in targets:
+        if target == "settings:raw":
+            lines.append("from settings import settings; settings.raw")
+            continue
+        lines.append(
+            f"try:\n    importlib.import_module({target!r})\nexcept ImportError:\n    pass"
+        )
+    return "\n".join(lines)
+
+
+def measure(targets):
+    """返回 (总导入耗时 ms, 已加载的重依赖列表)"""
+    code = build_code(targets)
+    code += (
+        "\nimport sys\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # 只累加顶层导入 (名字前没有额外缩进)，嵌套导入已经算进 cumulative 里
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return total_us / 1000, loaded
+
+
+def best_of(targets, repeat):
+    runs = [measure(targets) for _ in range(repeat)]
+    return min(r[0] for r in runs), runs[0][1]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="启动耗时基准测试 (python -X importtime)")
+    ap.add_argument("--repeat", type=int, default=5, help="每个场景重复次数，取最好成绩")
+    args = ap.parse_args()
+
+    print(f"{'场景':<12} {'当前 ms':>9} {'legacy ms':>10} {'加速':>6}  当前加载的重依赖")
+    for name, targets in SCENARIOS.items():
+        current_ms, loaded = best_of(targets, args.repeat)
+        legacy_ms, _ = best_of(LEGACY_EAGER + targets, args.repeat)
+        speedup = legacy_ms / current_ms if current_ms else float("inf")
+        print(
+            f"{name:<12} {current_ms:>9.1f} {legacy_ms:>10.1f} {speedup:>5.2f}x  "
+            f"{', '.join(loaded) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
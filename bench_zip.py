@@ -0,0 +1,82 @@
+"""
+zip 打包基准测试
+================
+生成一批不可压缩的合成 "MP3" (随机字节，和真实 MP3 一样几乎压不动)，
+分别用旧的 ZIP_DEFLATED 方式和新的 zip_files_flat (ZIP_STORED + 大缓冲流式写入) 打包，
+对比耗时、吞吐和压缩率。
+
+用法:
+    python bench_zip.py                 # 默认 2 GB / 40 个文件
+    python bench_zip.py --size-mb 200 --files 10
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+
+from auto_upload import clean_filename_string, zip_files_flat
+
+
+def legacy_zip(file_paths, output_zip_path):
+    """旧实现：所有文件都用 ZIP_DEFLATED"""
+    with zipfile.ZipFile(output_zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for file in file_paths:
+            zf.write(file, arcname=clean_filename_string(os.path.basename(file)))
+
+
+def make_batch(folder, total_mb, count):
+    per_file = total_mb * 1024 * 1024 // count
+    block = 4 * 1024 * 1024
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"2025010{i % 9 + 1}-Episode-{i}.mp3")
+        with open(path, "wb") as f:
+            left = per_file
+            while left > 0:
+                n = min(block, left)
+                f.write(os.urandom(n))
+                left -= n
+        paths.append(path)
+    return paths
+
+
+def run(label, func, paths, out_path):
+    src_bytes = sum(os.path.getsize(p) for p in paths)
+    started = time.time()
+    func(paths, out_path)
+    elapsed = time.time() - started
+    zip_bytes = os.path.getsize(out_path)
+    os.remove(out_path)
+    print(
+        f"{label:<10} {elapsed:>8.1f}s {src_bytes / 1024 / 1024 / elapsed:>10.1f} MB/s "
+        f"{zip_bytes / src_bytes:>9.1%}"
+    )
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="zip 打包基准测试")
+    ap.add_argument("--size-mb", type=int, default=2048, help="合成数据总大小 (MB)")
+    ap.add_argument("--files", type=int, default=40, help="文件个数")
+    ap.add_argument("--dir", default=None, help="临时目录 (默认系统临时目录)")
+    args = ap.parse_args()
+
+    folder = tempfile.mkdtemp(prefix="bench_zip_", dir=args.dir)
+    try:
+        print(f"生成合成数据: {args.size_mb} MB / {args.files} 个文件 -> {folder}")
+        paths = make_batch(folder, args.size_mb, args.files)
+        out_path = os.path.join(folder, "out.zip")
+
+        print(f"\n{'方式':<10} {'耗时':>9} {'吞吐':>15} {'压缩率':>9}")
+        old = run("deflate", legacy_zip, paths, out_path)
+        new = run("stored", zip_files_flat, paths, out_path)
+        print(f"\n加速比: {old / max(new, 1e-6):.1f}x")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
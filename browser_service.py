@@ -0,0 +1,184 @@
+"""
+常驻浏览器服务 (browser_service)
+================================
+每次 run_uploader 都要冷启动 Chromium、从 auth.json 建上下文、再等后台首页 networkidle。
+开启 browser_service 后，Chromium 作为独立进程常驻 (带远程调试端口和固定的用户目录)，
+上传时通过 CDP 连接上去，直接复用已经登录、已经打开后台首页的“热”页面。
+
+- 连接前先做健康检查 (/json/version)，服务没起来或卡死时自动重启
+- cookie 刷新后由上传端把 storage state 写回 auth.json
+
+命令行:
+    python browser_service.py start    # 启动 (已在运行则什么都不做)
+    python browser_service.py status   # 健康检查
+    python browser_service.py restart
+    python browser_service.py stop
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import time
+import urllib.request
+
+from settings import settings
+
+DEFAULT_BROWSER_SERVICE = {
+    # 是否让上传端通过 CDP 连接常驻浏览器 (false = 每次运行冷启动 Chromium)
+    "enabled": False,
+    "port": 9222,
+    # 常驻浏览器的用户目录，登录状态和缓存都保存在这里
+    "user_data_dir": os.path.join(".cache", "browser-profile"),
+    # 记录进程号 / 端口的状态文件
+    "state_file": os.path.join(".cache", "browser_service.json"),
+    # 健康检查 / 等待启动的超时 (秒)
+    "health_timeout_s": 3,
+    "start_timeout_s": 20,
+}
+
+
+def service_options(options=None):
+    if options is None:
+        options = settings.BROWSER_SERVICE or {}
+    merged = dict(DEFAULT_BROWSER_SERVICE)
+    merged.update(options)
+    return merged
+
+
+def endpoint(options):
+    return f"http://127.0.0.1:{options['port']}"
+
+
+def is_healthy(options):
+    """调试端口能在超时内返回 /json/version 就认为浏览器还活着"""
+    try:
+        with urllib.request.urlopen(
+            endpoint(options) + "/json/version", timeout=options["health_timeout_s"]
+        ) as resp:
+            return resp.status == 200 and "webSocketDebuggerUrl" in json.load(resp)
+    except (OSError, ValueError):
+        return False
+
+
+def _read_state(options):
+    try:
+        with open(options["state_file"], "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_state(options, state):
+    folder = os.path.dirname(options["state_file"])
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(options["state_file"], "w", encoding="utf-8") as f:
+        json.dump(state, f)
+
+
+def _chromium_executable():
+    """命令行启动时用；已经在运行 Playwright 的调用方 (上传端) 应直接传 executable，
+    同一线程里不能再嵌套一个 sync_playwright()"""
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as p:
+        return p.chromium.executable_path
+
+
+def start(options=None, headless=None, executable=None):
+    """启动常驻 Chromium (已经健康运行时直接返回)，返回 CDP 地址"""
+    options = service_options(options)
+    if is_healthy(options):
+        return endpoint(options)
+    if headless is None:
+        headless = settings.HEADLESS
+
+    os.makedirs(options["user_data_dir"], exist_ok=True)
+    args = [
+        executable or _chromium_executable(),
+        f"--remote-debugging-port={options['port']}",
+        f"--user-data-dir={os.path.abspath(options['user_data_dir'])}",
+        "--no-first-run",
+        "--no-default-browser-check",
+    ]
+    if headless:
+        args.append("--headless=new")
+    # 独立会话启动，本次运行结束后浏览器继续常驻
+    proc = subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    _write_state(options, {"pid": proc.pid, "port": options["port"], "started_at": time.time()})
+
+    deadline = time.time() + options["start_timeout_s"]
+    while time.time() < deadline:
+        if is_healthy(options):
+            print(f"🌐 常驻浏览器已启动 (pid {proc.pid}, 端口 {options['port']})")
+            return endpoint(options)
+        if proc.poll() is not None:
+            break
+        time.sleep(0.2)
+    raise RuntimeError(f"常驻浏览器启动失败 (端口 {options['port']})")
+
+
+def stop(options=None):
+    options = service_options(options)
+    pid = _read_state(options).get("pid")
+    if pid:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass
+        # 等进程退出，避免新进程和旧进程抢同一个用户目录
+        for _ in range(50):
+            try:
+                os.kill(pid, 0)
+            except OSError:
+                break
+            time.sleep(0.1)
+    if os.path.exists(options["state_file"]):
+        os.remove(options["state_file"])
+
+
+def restart(options=None, headless=None, executable=None):
+    print("♻️  常驻浏览器无响应，正在重启...")
+    stop(options)
+    return start(options, headless=headless, executable=executable)
+
+
+def ensure_running(options=None, headless=None, executable=None):
+    """健康检查，不健康就 (重新) 启动，返回 CDP 地址"""
+    options = service_options(options)
+    if is_healthy(options):
+        return endpoint(options)
+    if _read_state(options).get("pid"):
+        return restart(options, headless=headless, executable=executable)
+    return start(options, headless=headless, executable=executable)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="常驻浏览器服务 (CDP)")
+    ap.add_argument("command", choices=["start", "stop", "restart", "status"])
+    args = ap.parse_args(argv)
+
+    if args.command == "start":
+        print(f"✅ {start()}")
+    elif args.command == "stop":
+        stop()
+        print("🛑 已停止")
+    elif args.command == "restart":
+        print(f"✅ {restart()}")
+    else:
+        options = service_options()
+        state = _read_state(options)
+        healthy = is_healthy(options)
+        print(f"{'✅ 运行中' if healthy else '❌ 未运行或无响应'}  {endpoint(options)}  pid={state.get('pid')}")
+
+
+if __name__ == "__main__":
+    main()
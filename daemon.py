@@ -0,0 +1,194 @@
+"""
+守护模式 (daemon)
+=================
+main.py 默认是一次性脚本：每次运行都把所有 feed 轮询一遍、把所有栏目目录扫一遍。
+守护模式常驻运行，只在需要的时候做最少的事：
+
+- 每个 feed 有自己的轮询间隔：daemon.feeds 里单独配置 > feed 自己声明的 <ttl> > daemon.poll_minutes；
+  feed 没有新内容时间隔指数退避 (上限 max_poll_minutes)，一有新内容就恢复
+- 轮询式目录监视：DOWNLOAD_FOLDER 下某个栏目出现新的音频文件 (下载完成时才从 .part 改名，
+  看到就是完整文件)，只对这一个栏目触发上传；手动放进来的文件也一样
+- 上传失败后，仍有待上传文件 (离线比对) 的栏目每隔 upload_retry_minutes 重试，不用等新文件出现
+- 单个 feed 轮询出错只记录日志并按正常间隔重排，不会让守护进程退出
+- 下载和上传都在主线程里依次执行 (Playwright 同步接口要求)
+
+    python main.py --daemon
+"""
+
+import heapq
+import os
+import time
+
+import tracing
+from settings import settings
+
+DEFAULT_DAEMON = {
+    # 默认轮询间隔和上下限 (分钟)
+    "poll_minutes": 30,
+    "min_poll_minutes": 5,
+    "max_poll_minutes": 360,
+    # 目录监视的扫描间隔 (秒)
+    "watch_interval_s": 10,
+    # 上传失败后，隔多久 (分钟) 重试仍有待上传文件的栏目
+    "upload_retry_minutes": 5,
+    # 单独指定某些 feed 的轮询间隔 (分钟)，例如 {"Six Minute English": 60}
+    "feeds": {},
+}
+
+AUDIO_EXTENSIONS = (".mp3", ".m4a")
+
+
+class FeedSchedule:
+    """单个 feed 的轮询计划：基础间隔 × 退避倍数，夹在上下限之间"""
+
+    def __init__(self, name, url, options):
+        self.name = name
+        self.url = url
+        self.options = options
+        self.backoff = 1
+        self.fingerprint = None
+        self.ttl = None
+
+    def base_minutes(self):
+        configured = self.options["feeds"].get(self.name)
+        if configured:
+            return float(configured)
+        if self.ttl:
+            return max(float(self.ttl), float(self.options["poll_minutes"]))
+        return float(self.options["poll_minutes"])
+
+    def interval_s(self):
+        minutes = self.base_minutes() * self.backoff
+        minutes = min(max(minutes, self.options["min_poll_minutes"]), self.options["max_poll_minutes"])
+        return minutes * 60
+
+    def update(self, rows, ttl):
+        """根据本次轮询结果调整间隔，返回 feed 是否有变化"""
+        self.ttl = ttl
+        fingerprint = tuple(row.get("GUID") or row.get("链接") for row in rows[:5])
+        changed = fingerprint != self.fingerprint
+        self.fingerprint = fingerprint
+        if changed:
+            self.backoff = 1
+        elif self.base_minutes() * self.backoff < self.options["max_poll_minutes"]:
+            self.backoff *= 2
+        return changed
+
+
+class DirectoryWatcher:
+    """
+    轮询式目录监视：记住每个栏目目录里的音频文件名，
+    poll() 返回出现了新文件的栏目名列表。第一次 poll() 只建立基线。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._known = None
+
+    def _snapshot(self):
+        snapshot = {}
+        if not os.path.isdir(self.root):
+            return snapshot
+        with os.scandir(self.root) as channels:
+            for entry in channels:
+                if not entry.is_dir() or entry.name.startswith("."):
+                    continue
+                with os.scandir(entry.path) as files:
+                    snapshot[entry.name] = {
+                        f.name for f in files if f.name.endswith(AUDIO_EXTENSIONS)
+                    }
+        return snapshot
+
+    def poll(self):
+        current = self._snapshot()
+        if self._known is None:
+            self._known = current
+            return []
+        changed = [
+            channel
+            for channel, names in current.items()
+            if names - self._known.get(channel, set())
+        ]
+        self._known = current
+        return changed
+
+
+def _upload_channels(channels):
+    """上传这些栏目，返回失败后仍有待上传文件的栏目 (稍后重试)"""
+    from auto_upload import has_offline_work, run_uploader, scan_local_channels
+
+    try:
+        run_uploader(channels=channels)
+        return set()
+    except SystemExit:
+        # run_uploader 在上传失败时会 sys.exit(1)；守护模式记录下来，稍后重试
+        print("⚠️  本轮上传失败，稍后再试")
+    except Exception as e:
+        print(f"⚠️  本轮上传出错: {e}，稍后再试")
+    return {c for c in (channels or scan_local_channels()) if has_offline_work(c)}
+
+
+def run_daemon(stop_after=None):
+    """
+    守护循环。stop_after (秒) 只用于调试：运行这么久之后退出。
+    """
+    import fetch_rss
+
+    options = dict(DEFAULT_DAEMON)
+    options.update(settings.DAEMON or {})
+
+    queue = []
+    schedules = {}
+    now = time.time()
+    for name, url in settings.RSS_FEEDS.items():
+        schedules[name] = FeedSchedule(name, url, options)
+        heapq.heappush(queue, (now, name))
+
+    watcher = DirectoryWatcher(settings.DOWNLOAD_FOLDER)
+    # 启动时先把已有但还没上传的文件处理掉 (离线比对会跳过没活的栏目)
+    watcher.poll()
+    retry_channels = set()
+    retry_at = 0.0
+    retry_s = options["upload_retry_minutes"] * 60
+    if settings.ENABLE_UPLOAD:
+        retry_channels = _upload_channels(None)
+        retry_at = time.time() + retry_s
+
+    started = time.time()
+    print(f"🛰️ 守护模式: {len(schedules)} 个 feed，目录监视间隔 {options['watch_interval_s']}s")
+    while stop_after is None or time.time() - started < stop_after:
+        # 1. 到期的 feed 依次轮询
+        while settings.ENABLE_FETCH and queue and queue[0][0] <= time.time():
+            _, name = heapq.heappop(queue)
+            schedule = schedules[name]
+            try:
+                with tracing.span("daemon_poll", feed=name) as sp:
+                    rows = fetch_rss.fetch_one_feed(name, schedule.url) or []
+                    changed = schedule.update(rows, fetch_rss.feed_ttls.get(schedule.url))
+                    sp["outcome"] = "changed" if changed else "unchanged"
+                status = "有变化" if changed else "无变化"
+            except Exception as e:
+                # Excel 写入、转码等任何一步出错都只影响这一次轮询
+                print(f"❌ [{name}] 轮询出错: {e}")
+                status = "出错"
+            interval = schedule.interval_s()
+            heapq.heappush(queue, (time.time() + interval, name))
+            print(f"🕒 [{name}] {status}，{interval / 60:.0f} 分钟后再查")
+
+        # 2. 有新文件的栏目，加上之前上传失败、仍有待上传文件的栏目
+        changed_channels = watcher.poll()
+        retry = sorted(retry_channels - set(changed_channels)) if time.time() >= retry_at else []
+        if settings.ENABLE_UPLOAD and (changed_channels or retry):
+            if changed_channels:
+                print(f"📥 新文件: {changed_channels}")
+            if retry:
+                print(f"🔁 重试上传: {retry}")
+            failed = _upload_channels(list(changed_channels) + retry)
+            # 这次没轮到重试的栏目留着，下次到点再试
+            retry_channels = (retry_channels - set(changed_channels) - set(retry)) | failed
+            if failed or retry:
+                retry_at = time.time() + retry_s
+
+        # 3. 睡到下一个 feed 到期或下一次目录扫描
+        next_due = queue[0][0] if queue and settings.ENABLE_FETCH else float("inf")
+        time.sleep(max(min(next_due - time.time(), options["watch_interval_s"]), 0.5))
@@ -0,0 +1,149 @@
+"""
+本地模拟的每日英语听力后台 (只用于验证 HTTP 上传后端)
+=====================================================
+实现 uploaders.HttpUploader 用到的三个接口，数据保存在内存里：
+
+    GET  /Ting/api/channels                    -> [{"id": 1, "name": "..."}]
+    GET  /Ting/api/channels/<id>/items         -> [{"title": "..."}]
+    POST /Ting/api/upload  (multipart: channel_id / ai_subtitle / file)
+
+没有带 auth.json 里任意一个 cookie 的请求返回 401。上传 ZIP 时按包内的文件名登记标题。
+
+用法:
+    python fake_eudic_server.py --port 8800 --channels "Six Minute English" "CNN 10"
+    然后在 config.yaml 里设置:
+        upload_backend: http
+        http_upload: {base_url: "http://127.0.0.1:8800"}
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeEudic:
+    def __init__(self, channel_names, cookie_names=None):
+        self.channels = {i + 1: name for i, name in enumerate(channel_names)}
+        self.items = {i: [] for i in self.channels}
+        self.cookie_names = set(cookie_names or [])
+        self.lock = threading.Lock()
+
+    def add_upload(self, channel_id, filename, data):
+        if filename.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                names = [n for n in zf.namelist() if not n.endswith("/")]
+        else:
+            names = [filename]
+        with self.lock:
+            for name in names:
+                self.items[channel_id].append(
+                    {"title": os.path.splitext(os.path.basename(name))[0]}
+                )
+        return names
+
+
+def _parse_multipart(body, content_type):
+    """极简 multipart 解析，返回 (普通字段 dict, 文件名, 文件内容)"""
+    boundary = re.search(r"boundary=([^;]+)", content_type).group(1).encode()
+    fields, filename, file_data = {}, None, b""
+    for part in body.split(b"--" + boundary):
+        if b"\r\n\r\n" not in part:
+            continue
+        head, _, value = part.partition(b"\r\n\r\n")
+        value = value[:-2] if value.endswith(b"\r\n") else value
+        head = head.decode("utf-8", "replace")
+        name = re.search(r'name="([^"]*)"', head)
+        fname = re.search(r'filename="([^"]*)"', head)
+        if fname:
+            filename, file_data = fname.group(1), value
+        elif name:
+            fields[name.group(1)] = value.decode("utf-8")
+    return fields, filename, file_data
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            print(f"[fake-eudic] {self.command} {self.path} -> {args[1] if len(args) > 1 else ''}")
+
+        def _json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _authorized(self):
+            if not state.cookie_names:
+                return True
+            cookie = self.headers.get("Cookie", "")
+            sent = {c.split("=", 1)[0].strip() for c in cookie.split(";") if "=" in c}
+            return bool(sent & state.cookie_names)
+
+        def do_GET(self):
+            if not self._authorized():
+                return self._json(401, {"error": "not logged in"})
+            if self.path == "/Ting/api/channels":
+                return self._json(
+                    200, [{"id": i, "name": n} for i, n in state.channels.items()]
+                )
+            m = re.fullmatch(r"/Ting/api/channels/(\d+)/items", self.path)
+            if m and int(m.group(1)) in state.items:
+                with state.lock:
+                    return self._json(200, list(state.items[int(m.group(1))]))
+            self._json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            if not self._authorized():
+                return self._json(401, {"error": "not logged in"})
+            if self.path != "/Ting/api/upload":
+                return self._json(404, {"error": "not found"})
+            fields, filename, data = _parse_multipart(
+                body, self.headers.get("Content-Type", "")
+            )
+            channel_id = int(fields.get("channel_id", 0))
+            if channel_id not in state.items or not filename:
+                return self._json(400, {"success": False, "error": "bad request"})
+            names = state.add_upload(channel_id, filename, data)
+            self._json(200, {"success": True, "items": names})
+
+    return Handler
+
+
+def serve(port, channel_names, auth_file=None):
+    cookie_names = []
+    if auth_file and os.path.exists(auth_file):
+        with open(auth_file, "r", encoding="utf-8") as f:
+            cookie_names = [c["name"] for c in json.load(f).get("cookies", [])]
+    state = FakeEudic(channel_names, cookie_names)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    return server, state
+
+
+def main():
+    ap = argparse.ArgumentParser(description="本地模拟的每日英语听力上传接口")
+    ap.add_argument("--port", type=int, default=8800)
+    ap.add_argument("--channels", nargs="+", default=["Six Minute English"])
+    ap.add_argument("--auth", default="auth.json", help="只接受带这个文件里 cookie 的请求")
+    args = ap.parse_args()
+
+    server, _ = serve(args.port, args.channels, args.auth)
+    print(f"🧪 fake eudic 已启动: http://127.0.0.1:{args.port}  栏目: {args.channels}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+流式 RSS 解析 (feed_parser: stream)
+===================================
+feedparser 要先把整个 feed 读进内存再逐条解析，几千集的归档 feed 也全部要过一遍 dateutil。
+这里改用 xml.etree 的增量解析 (XMLPullParser)：边下载边解析，每处理完一个 <item> 就丢掉，
+内存占用和 feed 长度无关。
+
+播客 feed 按发布时间倒序排列，所以给了 year_from / num_limit 时可以提前结束：
+- 已经收集到 num_limit 个落在年份范围内的条目
+- 或者遇到早于 year_from 的条目 (后面只会更旧)
+提前结束时直接关闭连接，剩下的内容不再下载。
+
+日期先走 RFC 822 / ISO 8601 的正则快速路径，解析不了才交给 dateutil。
+"""
+
+import re
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+ITUNES_NS = "{http://www.itunes.com/dtds/podcast-1.0.dtd}"
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+ITEM_TAGS = ("item", ATOM_NS + "entry")
+
+_MONTHS = {
+    m: i
+    for i, m in enumerate(
+        ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1
+    )
+}
+# "Tue, 31 Dec 2024 08:00:00 +0000" / "31 Dec 2024"
+_RFC822 = re.compile(r"(?:[A-Za-z]{3},\s*)?(\d{1,2})\s+([A-Za-z]{3})[a-z]*\s+(\d{4})")
+# "2024-12-31T08:00:00Z" (Atom)
+_ISO8601 = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
+
+def parse_date(raw):
+    """
+    返回 (日期 "YYYY-MM-DD", 文件日期 "YYYYMMDD")，解析失败返回 ("", "")。
+    和 dateutil 一样取字面上的日期，不做时区换算。
+    """
+    raw = (raw or "").strip()
+    if not raw:
+        return "", ""
+    m = _RFC822.match(raw)
+    if m and m.group(2).lower() in _MONTHS:
+        year, month, day = int(m.group(3)), _MONTHS[m.group(2).lower()], int(m.group(1))
+    else:
+        m = _ISO8601.match(raw)
+        if m:
+            year, month, day = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        else:
+            try:
+                from dateutil import parser as date_parser
+
+                dt = date_parser.parse(raw)
+            except Exception:
+                return "", ""
+            year, month, day = dt.year, dt.month, dt.day
+    return f"{year:04d}-{month:02d}-{day:02d}", f"{year:04d}{month:02d}{day:02d}"
+
+
+def _text(elem, tag):
+    child = elem.find(tag)
+    return (child.text or "").strip() if child is not None else ""
+
+
+def _item_to_row(elem, parse_duration):
+    """把一个 <item> / <entry> 转成和 parse_rss 相同结构的字典"""
+    date_str, file_date = parse_date(
+        _text(elem, "pubDate") or _text(elem, ATOM_NS + "published") or _text(elem, ATOM_NS + "updated")
+    )
+
+    audio_link = ""
+    link = _text(elem, "link")
+    enclosure = elem.find("enclosure")
+    if enclosure is not None:
+        audio_link = enclosure.get("url", "")
+    for atom_link in elem.iterfind(ATOM_NS + "link"):
+        if atom_link.get("rel") == "enclosure" and not audio_link:
+            audio_link = atom_link.get("href", "")
+        elif atom_link.get("rel", "alternate") == "alternate" and not link:
+            link = atom_link.get("href", "")
+    link = audio_link or link
+
+    return {
+        "日期": date_str,
+        "文件日期": file_date,
+        "题目": _text(elem, "title") or _text(elem, ATOM_NS + "title"),
+        "简介": _text(elem, "description")
+        or _text(elem, ITUNES_NS + "summary")
+        or _text(elem, ATOM_NS + "summary"),
+        "时长": parse_duration(_text(elem, ITUNES_NS + "duration")),
+        "链接": link,
+        "GUID": _text(elem, "guid") or _text(elem, ATOM_NS + "id") or link,
+    }
+
+
+def iter_rows(
+    chunks, parse_duration, year_from=None, year_end=None, num_limit=None, meta=None
+):
+    """
+    增量解析字节块 (例如 response.iter_content())，逐个产出条目字典。
+    year_from / num_limit 不为空时按倒序假设提前结束；num_limit=-1 表示不限数量。
+    meta 不为空时写入频道级信息 (目前只有 <ttl>，单位分钟)。
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    stack = []
+    matched = 0
+
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    stack.append(elem)
+                    continue
+                stack.pop()
+                if elem.tag == "ttl" and meta is not None and len(stack) == 2:
+                    # <rss><channel><ttl>
+                    meta["ttl"] = (elem.text or "").strip()
+                if elem.tag not in ITEM_TAGS:
+                    continue
+
+                row = _item_to_row(elem, parse_duration)
+                # 处理完就从父节点摘掉，整棵树不会随 feed 长度增长
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+                yield row
+
+                year = int(row["文件日期"][:4]) if row["文件日期"][:4].isdigit() else None
+                if year is None:
+                    continue
+                if year_from is not None and year < year_from:
+                    return
+                if year_end is not None and year > year_end:
+                    continue
+                if row["链接"]:
+                    matched += 1
+                    if num_limit is not None and num_limit != -1 and matched >= num_limit:
+                        return
+    except ParseError as e:
+        # 不规范的 feed (例如未定义的 HTML 实体 &nbsp;) 会在中途报错：
+        # 和 feedparser 一样容错，保留出错位置之前已经解析出来的条目
+        print(f"⚠️  feed 中途解析出错，保留已解析的条目: {e}")
+        return
+    try:
+        parser.close()
+    except ParseError:
+        # feed 被截断时保留已经解析出来的条目
+        pass
@@ -1,51 +1,191 @@
 import sys
 import os
+import hashlib
 import re
-import requests
-import feedparser
-import pandas as pd
-import yaml  # <--- [新增] 必须安装: pip install PyYAML
-from dateutil import parser as date_parser
+import json
+import threading
+import time
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import shutil
 
-# ================= 配置加载逻辑 (Config Loading) =================
+import tracing
+from host_scheduler import scheduler
+from json_store import JsonStore
+from manifest import Manifest
+from settings import settings
 
-CONFIG_FILE = "config.yaml"
+# requests / feedparser / pandas / dateutil 都比较重，只在真正用到的函数里导入，
+# 这样只做上传、或者只读配置的时候不用付这部分启动时间。
 
 
-def load_config():
+def __getattr__(name):
+    """兼容旧写法: fetch_rss.DOWNLOAD_FOLDER 等大写配置项转发到 settings"""
+    try:
+        return getattr(settings, name)
+    except AttributeError:
+        raise AttributeError(f"module 'fetch_rss' has no attribute '{name}'") from None
+
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) Chrome/120.0.0.0 Safari/537.36"
+}
+
+# ================= HTTP 连接池 (每个 host 一个 keep-alive Session) =================
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url):
     """
-    读取 YAML 配置文件
-    返回一个 Python 字典，例如: {'rss_feeds': {...}, 'year_from': 2025}
+    按 host 复用 requests.Session，同一个站点的多次请求共用 keep-alive 连接。
+    多个线程同时拿同一个 host 的 Session 是安全的 (连接池大小按 settings.FETCH_WORKERS 设置)。
+    """
+    import requests
+
+    host = urlparse(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            # 连接池要容得下这个 host 的自适应并发上限
+            pool_size = max(
+                max(settings.FETCH_WORKERS, 1) * 2, int(scheduler.options["max"])
+            )
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=pool_size, pool_maxsize=pool_size
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+        return session
+
+
+# ================= Feed 条件请求缓存 (ETag / Last-Modified) =================
+
+
+class FeedCache:
+    """
+    以 URL 为 key 的磁盘缓存，记录 ETag / Last-Modified 以及解析好的 rows。
+    服务器返回 304 时直接复用 rows，既不下载正文也不再跑 feedparser。
     """
-    if not os.path.exists(CONFIG_FILE):
-        print(f"⚠️  警告: 找不到配置文件 {CONFIG_FILE}，将使用代码内的默认值。")
-        return {}
 
-    try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            # yaml.safe_load 是将 yaml 文本转为 python 字典的核心函数
-            return yaml.safe_load(f) or {}
-    except Exception as e:
-        print(f"❌ 读取配置文件失败: {e}")
-        return {}
+    def __init__(self, path=None):
+        self._store = JsonStore(path, setting="FEED_CACHE_FILE")
+        self._lock = self._store.lock
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def path(self):
+        return self._store.path
+
+    def get(self, url):
+        return self._store.load().get(url)
+
+    def put(self, url, etag, last_modified, rows, ttl=None):
+        with self._lock:
+            self._store.load()[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "rows": rows,
+                "ttl": ttl,
+            }
+            self._store.save()
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+feed_cache = FeedCache()
+manifest = Manifest()
+# url -> feed 自己声明的 <ttl> (分钟)，守护模式据此安排轮询间隔
+feed_ttls = {}
+
+
+# ================= 并发输出分组 =================
+
+
+class _ThreadRoutedStream:
+    """
+    把登记过缓冲区的线程的输出写进各自的缓冲区，其他线程照常写到原始流。
+    这样并发处理多个 feed 时，每个 feed 的日志仍然是完整的一段，不会互相穿插。
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self._local = threading.local()
+
+    def write(self, data):
+        buf = getattr(self._local, "buffer", None)
+        if buf is not None:
+            buf.append(data)
+        else:
+            self.target.write(data)
+
+    def flush(self):
+        if getattr(self._local, "buffer", None) is None:
+            self.target.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.target, name)
+
+    def run_captured(self, func, *args, **kwargs):
+        """在当前线程里执行 func，返回 (它打印的全部内容, 异常或 None)"""
+        self._local.buffer = []
+        error = None
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            error = e
+            self._local.buffer.append(f"❌ 处理失败: {e}\n")
+        finally:
+            text = "".join(self._local.buffer)
+            self._local.buffer = None
+        return text, error
 
 
-# 1. 在模块加载时，立即执行读取
-_config = load_config()
+_router_lock = threading.Lock()
+_router = None
+_router_users = 0
+_saved_streams = None
 
-# 2. 初始化全局变量
-# 这里实现了 yaml(小写) 到 python(大写) 的映射
-# 如果 yaml 里没写或者读不到，就用逗号后面的默认值
-RSS_FEEDS = _config.get("rss_feeds", {})
-YEAR_FROM = _config.get("year_from", 2025)
-YEAR_END = _config.get("year_end", 9999)
-LATEST_NUM = _config.get("latest_num", 2)
-DOWNLOAD_FOLDER = _config.get("download_folder", "rss_download")
-HEADLESS = _config.get("headless", False)
-ENABLE_FETCH = _config.get("enable_fetch", True)
-ENABLE_UPLOAD = _config.get("enable_upload", True)
+
+@contextmanager
+def grouped_output():
+    """
+    让工作线程的输出按任务分组。整个进程只装一个路由 (sys.stdout/sys.stderr)，
+    各阶段 (下载线程池、上传工作者，流水线模式下同时运行) 只是登记使用；
+    最后一个离开的才恢复原来的流，先结束的阶段不会把别人的路由拆掉。
+    log_to_file 在整个运行期间持有一份，所以正常运行时路由只安装一次。
+    """
+    global _router, _router_users, _saved_streams
+    with _router_lock:
+        if _router_users == 0:
+            _saved_streams = (sys.stdout, sys.stderr)
+            _router = _ThreadRoutedStream(sys.stdout)
+            sys.stdout = sys.stderr = _router
+        _router_users += 1
+        router = _router
+    try:
+        yield router
+    finally:
+        with _router_lock:
+            _router_users -= 1
+            if _router_users == 0:
+                sys.stdout, sys.stderr = _saved_streams
+                _router = _saved_streams = None
 
 # ================= 工具函数 =================
 
@@ -68,14 +208,55 @@ def sanitize_filename(name: str) -> str:
     return re.sub(r"\s+", "-", name)
 
 
-def parse_rss(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) Chrome/120.0.0.0 Safari/537.36"
-    }
+def parse_rss(url, year_from=None, year_end=None, num_limit=None):
+    """
+    解析 feed，返回条目字典列表。
+    feed_parser=stream (config.yaml) 时使用流式解析，并根据 year_from / num_limit 提前结束；
+    不传这些参数时流式解析也会读完整个 feed。
+    """
+    with tracing.span("parse_rss", url=url) as sp:
+        if settings.FEED_PARSER == "stream":
+            sp["parser"] = "stream"
+            rows = _parse_rss_stream(url, sp, year_from, year_end, num_limit)
+        else:
+            rows = _parse_rss(url, sp)
+        sp["items"] = len(rows)
+        return rows
+
+
+def _conditional_headers(cached):
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+
+def _parse_rss(url, sp):
+    import feedparser
+    from dateutil import parser as date_parser
+
+    cached = feed_cache.get(url)
+    headers = _conditional_headers(cached)
+
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        with scheduler.request(url) as req:
+            response = get_session(url).get(url, headers=headers, timeout=15)
+            req.response(response)
+        if response.status_code == 304 and cached:
+            feed_cache.record(hit=True)
+            sp["outcome"] = "cached"
+            print("♻️  feed 未变化 (304)，使用缓存数据")
+            feed_ttls[url] = _parse_ttl(cached.get("ttl"))
+            return cached["rows"]
+        sp["bytes"] = len(response.content)
         feed = feedparser.parse(response.content)
+        ttl = feed.feed.get("ttl")
+        feed_ttls[url] = _parse_ttl(ttl)
     except Exception as e:
+        sp["outcome"] = "error"
         print(f"Error fetching {url}: {e}")
         return []
 
@@ -106,8 +287,83 @@ def parse_rss(url):
                 "简介": summary,
                 "时长": duration_fmt,
                 "链接": link,
+                "GUID": entry.get("id", "") or link,
             }
         )
+
+    feed_cache.record(hit=False)
+    if response.ok and rows:
+        feed_cache.put(
+            url,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            rows,
+            ttl=ttl,
+        )
+    return rows
+
+
+def _parse_ttl(raw):
+    """<ttl> 转成分钟数，没有或不合法时返回 None"""
+    try:
+        ttl = int(str(raw).strip())
+    except (TypeError, ValueError):
+        return None
+    return ttl if ttl > 0 else None
+
+
+def _parse_rss_stream(url, sp, year_from, year_end, num_limit):
+    """流式解析：边下载边解析，满足 year_from / num_limit 后立即断开连接"""
+    from feed_stream import iter_rows
+
+    # 提前结束时只拿到了部分条目，缓存按参数区分，避免换了参数后复用不完整的结果
+    cache_key = url
+    if year_from is not None or num_limit is not None:
+        cache_key = f"{url}#stream:{year_from}:{year_end}:{num_limit}"
+    cached = feed_cache.get(cache_key)
+    headers = _conditional_headers(cached)
+
+    received = [0]
+    meta = {}
+
+    def chunks(resp):
+        for chunk in resp.iter_content(64 * 1024):
+            received[0] += len(chunk)
+            yield chunk
+
+    try:
+        with scheduler.request(url) as req, get_session(url).get(
+            url, headers=headers, timeout=15, stream=True
+        ) as response:
+            req.response(response)
+            if response.status_code == 304 and cached:
+                feed_cache.record(hit=True)
+                sp["outcome"] = "cached"
+                print("♻️  feed 未变化 (304)，使用缓存数据")
+                feed_ttls[url] = _parse_ttl(cached.get("ttl"))
+                return cached["rows"]
+            rows = list(
+                iter_rows(
+                    chunks(response), parse_duration, year_from, year_end, num_limit, meta
+                )
+            )
+    except Exception as e:
+        sp["outcome"] = "error"
+        print(f"Error fetching {url}: {e}")
+        return []
+    finally:
+        sp["bytes"] = received[0]
+
+    feed_ttls[url] = _parse_ttl(meta.get("ttl"))
+    feed_cache.record(hit=False)
+    if response.ok and rows:
+        feed_cache.put(
+            cache_key,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            rows,
+            ttl=meta.get("ttl"),
+        )
     return rows
 
 
@@ -115,7 +371,7 @@ def download_audios(rows, subfolder, year_from_limit, year_end_limit, num_limit)
     """
     下载逻辑：接收 year_from_limit/year_end_limit 和 num_limit 参数，不再依赖全局变量
     """
-    out_dir = os.path.join(DOWNLOAD_FOLDER, subfolder)
+    out_dir = os.path.join(settings.DOWNLOAD_FOLDER, subfolder)
     os.makedirs(out_dir, exist_ok=True)
 
     filtered_rows = [
@@ -137,20 +393,331 @@ def download_audios(rows, subfolder, year_from_limit, year_end_limit, num_limit)
         fname = f"{datepart}-{titlepart}{ext}"
         dest = os.path.join(out_dir, fname)
 
+        key = item.get("GUID") or item["链接"]
         if os.path.exists(dest):
-            continue
+            if manifest.get(key) is not None:
+                continue
+            # 目录里已有但清单里没有 (例如旧版本下载的)：旧版本直接写 dest，中断时会留下不完整的文件，
+            # 先和 HEAD 的 Content-Length 比一下，大小对得上才补记一笔，否则重新下载
+            expected, _, _ = _probe_size(get_session(item["链接"]), item["链接"])
+            if expected is None or os.path.getsize(dest) == expected:
+                digest = _file_hasher(dest).hexdigest()
+                manifest.record_download(
+                    key, subfolder, item["题目"], item["链接"], dest, sha256=digest
+                )
+                continue
+            print(f"  ⚠️ 已有文件不完整 ({os.path.getsize(dest)}/{expected} 字节)，重新下载")
+            os.remove(dest)
+        record = manifest.get(key)
+        if settings.INCREMENTAL:
+            if record is not None and record["uploaded_at"]:
+                # 已经上传过，本地文件被清理掉了也不再重复下载
+                continue
+        if record is not None and record["duplicate_of"] and record["path"] is None:
+            # 之前已确认和别的节目内容相同，原始文件还在就不再下载
+            if manifest.find_content(record["sha256"], exclude_key=key) is not None:
+                continue
 
         print(f"Downloading → {fname}")
         try:
-            resp = requests.get(item["链接"], stream=True, timeout=60)
-            resp.raise_for_status()
-            with open(dest, "wb") as f:
-                for chunk in resp.iter_content(8192):
-                    f.write(chunk)
+            with tracing.span("download", file=fname) as sp:
+                sp["bytes"], digest = download_file(item["链接"], dest)
+            _record_with_dedupe(key, subfolder, item, dest, digest)
         except Exception as e:
             print(f"  ✗ failed: {e}")
 
 
+def _record_with_dedupe(key, subfolder, item, dest, digest):
+    """
+    按内容 sha256 查重后写入清单。content_dedupe (config.yaml):
+    - link: 重复文件换成指向原始文件的硬链接 (不占额外磁盘，上传时可按内容跳过)
+    - skip: 删除重复文件，只在清单里记一笔
+    - off:  不处理
+    """
+    mode = settings.CONTENT_DEDUPE
+    original = None
+    if mode in ("link", "skip"):
+        original = manifest.find_content(digest, exclude_key=key)
+    if original is None:
+        manifest.record_download(key, subfolder, item["题目"], item["链接"], dest, sha256=digest)
+        return
+
+    print(f"  ♊ 内容与 [{original['feed']}] {original['title']} 相同")
+    size = os.path.getsize(dest)
+    if mode == "skip":
+        os.remove(dest)
+        dest = None
+    else:
+        try:
+            os.remove(dest)
+            os.link(original["path"], dest)
+        except OSError as e:
+            # 跨文件系统等情况不能硬链接，退回为保留一份副本
+            print(f"  ⚠️ 无法创建硬链接 ({e})，保留副本")
+            if not os.path.exists(dest):
+                shutil.copyfile(original["path"], dest)
+    manifest.record_download(
+        key,
+        subfolder,
+        item["题目"],
+        item["链接"],
+        dest,
+        size=size,
+        sha256=digest,
+        duplicate_of=original["key"],
+    )
+
+
+def _file_hasher(path):
+    """返回已经读入 path 全部内容的 sha256 对象，续传时用它接着算"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_BUFFER), b""):
+            hasher.update(chunk)
+    return hasher
+
+
+# ================= 断点续传 / 分段下载 =================
+
+COPY_BUFFER = 1024 * 1024
+
+
+def download_file(url, dest):
+    """
+    下载 url 到 dest：
+    - 先写入 dest + ".part"，中断后再次运行会用 HTTP Range 从断点继续；
+      开始下载时把 ETag / Last-Modified 记在 .part.meta 里，续传请求带 If-Range，
+      服务器上的文件变了就丢掉旧的 .part 从头下载，不会把两个版本拼在一起
+    - 服务器支持 Accept-Ranges 且文件足够大时，拆成多段并行下载
+    - 只有大小校验通过的文件才会 rename 成 dest
+    - 边下载边计算 sha256 (续传时先把已有部分读一遍)
+    返回 (文件大小 (字节), sha256 十六进制串)
+    """
+    part_path = dest + ".part"
+    session = get_session(url)
+    total, accept_ranges, validator = _probe_size(session, url)
+
+    segment_paths = _segment_paths(part_path, settings.DOWNLOAD_SEGMENTS)
+    partials = [p for p in [part_path] + segment_paths if os.path.exists(p)]
+    # 服务器给了校验值时，只续传同一个版本的 .part (没有 .meta 的是旧版本留下的，无法确认)
+    if partials and validator and _read_part_validator(part_path) != validator:
+        print("  ⟲ 服务器上的文件已变化 (或无法确认版本)，丢弃旧的 .part 重新下载")
+        for p in partials:
+            os.remove(p)
+    if validator:
+        _write_part_validator(part_path, validator)
+
+    use_segments = (
+        accept_ranges
+        and total
+        and settings.DOWNLOAD_SEGMENTS > 1
+        and total >= settings.SEGMENT_MIN_MB * 1024 * 1024
+        and not os.path.exists(part_path)
+    )
+    # 上次是分段下载中断的，不管大小阈值，继续按分段恢复
+    if accept_ranges and total and any(os.path.exists(p) for p in segment_paths):
+        use_segments = True
+
+    if use_segments:
+        print(f"  ⇉ 分 {settings.DOWNLOAD_SEGMENTS} 段并行下载 ({total / 1024 / 1024:.1f} MB)")
+        digest = _download_segmented(
+            session, url, part_path, total, segment_paths, validator
+        )
+    else:
+        total, digest = _download_resumable(session, url, part_path, total, validator)
+
+    size = os.path.getsize(part_path)
+    if total is not None and size > total:
+        # 比服务器声明的还大，续传也修不好，删掉下次从头下载
+        _discard_part(part_path)
+        raise IOError(f"文件大小不符: {size}/{total} 字节，已删除 .part，下次从头下载")
+    if total is not None and size != total:
+        raise IOError(f"文件不完整: {size}/{total} 字节，保留 .part 下次续传")
+    os.replace(part_path, dest)
+    if os.path.exists(_part_meta_path(part_path)):
+        os.remove(_part_meta_path(part_path))
+    return size, digest
+
+
+def _part_meta_path(part_path):
+    return part_path + ".meta"
+
+
+def _discard_part(part_path):
+    for path in (part_path, _part_meta_path(part_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _read_part_validator(part_path):
+    try:
+        with open(_part_meta_path(part_path), "r", encoding="utf-8") as f:
+            return json.load(f).get("validator")
+    except (OSError, ValueError):
+        return None
+
+
+def _write_part_validator(part_path, validator):
+    with open(_part_meta_path(part_path), "w", encoding="utf-8") as f:
+        json.dump({"validator": validator}, f)
+
+
+def _validator_from_headers(headers):
+    """If-Range 只能用强 ETag 或 Last-Modified"""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def _probe_size(session, url):
+    """HEAD 探测文件大小、是否支持 Range 和版本校验值，失败时返回 (None, False, None)"""
+    import requests
+
+    try:
+        with scheduler.request(url) as req:
+            resp = session.head(url, allow_redirects=True, timeout=30)
+            req.response(resp)
+        if not resp.ok:
+            return None, False, None
+        length = resp.headers.get("Content-Length")
+        accept_ranges = resp.headers.get("Accept-Ranges", "").lower() == "bytes"
+        return (
+            int(length) if length and length.isdigit() else None,
+            accept_ranges,
+            _validator_from_headers(resp.headers),
+        )
+    except requests.RequestException:
+        return None, False, None
+
+
+def _total_from_response(resp):
+    """从 200 的 Content-Length 或 206 的 Content-Range 推算文件总大小"""
+    if resp.status_code == 206:
+        content_range = resp.headers.get("Content-Range", "")
+        total = content_range.rsplit("/", 1)[-1]
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+def _download_resumable(session, url, part_path, total, validator=None):
+    """
+    单连接下载，失败后用 Range 从 .part 的当前大小继续，返回 (文件总大小, sha256)。
+    带 If-Range: 文件在两次请求之间变了，服务器返回 200 整个文件，从头写
+    """
+    import requests
+
+    last_error = None
+    for attempt in range(settings.DOWNLOAD_RETRIES + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if total is not None and offset > total:
+            # .part 比文件还大 (服务器没给校验值时文件变小了，或者 .part 已损坏)，从头下载
+            print(f"  ⟲ .part 比文件大 ({offset}/{total} 字节)，丢弃后从头下载")
+            _discard_part(part_path)
+            if validator:
+                _write_part_validator(part_path, validator)
+            offset = 0
+        if total is not None and offset == total:
+            return total, _file_hasher(part_path).hexdigest()
+
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        if offset and validator:
+            headers["If-Range"] = validator
+        try:
+            with scheduler.request(url) as req, session.get(
+                url, headers=headers, stream=True, timeout=60
+            ) as resp:
+                req.response(resp)
+                resp.raise_for_status()
+                if offset and resp.status_code != 206:
+                    # 服务器不支持续传，只能从头开始
+                    offset = 0
+                total = _total_from_response(resp) or total
+                if offset:
+                    print(f"  ↻ 从 {offset / 1024 / 1024:.1f} MB 处继续下载")
+                hasher = _file_hasher(part_path) if offset else hashlib.sha256()
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in resp.iter_content(COPY_BUFFER):
+                        f.write(chunk)
+                        hasher.update(chunk)
+            return total, hasher.hexdigest()
+        except (requests.RequestException, OSError) as e:
+            last_error = e
+            if attempt < settings.DOWNLOAD_RETRIES:
+                time.sleep(min(2**attempt, 10))
+    raise last_error
+
+
+def _segment_paths(part_path, count):
+    return [f"{part_path}.{i}" for i in range(count)]
+
+
+def _download_segment(session, url, seg_path, start, end, validator=None):
+    """下载 [start, end] 字节到 seg_path，支持断点续传 (带 If-Range，文件变了会收到 200 而失败)"""
+    import requests
+
+    expected = end - start + 1
+    last_error = None
+    for attempt in range(settings.DOWNLOAD_RETRIES + 1):
+        done = os.path.getsize(seg_path) if os.path.exists(seg_path) else 0
+        if done >= expected:
+            return
+        headers = {"Range": f"bytes={start + done}-{end}"}
+        if validator:
+            headers["If-Range"] = validator
+        try:
+            with scheduler.request(url) as req, session.get(
+                url, headers=headers, stream=True, timeout=60
+            ) as resp:
+                req.response(resp)
+                resp.raise_for_status()
+                if resp.status_code != 206:
+                    raise IOError(f"服务器未返回 206 (实际 {resp.status_code})")
+                with open(seg_path, "ab") as f:
+                    for chunk in resp.iter_content(COPY_BUFFER):
+                        f.write(chunk)
+            if os.path.getsize(seg_path) == expected:
+                return
+            last_error = IOError(f"分段大小不符: {seg_path}")
+        except (requests.RequestException, OSError) as e:
+            last_error = e
+        if attempt < settings.DOWNLOAD_RETRIES:
+            time.sleep(min(2**attempt, 10))
+    raise last_error
+
+
+def _download_segmented(session, url, part_path, total, segment_paths, validator=None):
+    """按字节范围并行下载各段，全部完成后按顺序拼接成 .part，拼接时计算 sha256"""
+    count = len(segment_paths)
+    step = -(-total // count)
+    ranges = [
+        (i * step, min((i + 1) * step, total) - 1)
+        for i in range(count)
+        if i * step < total
+    ]
+
+    with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+        futures = [
+            pool.submit(_download_segment, session, url, seg_path, start, end, validator)
+            for seg_path, (start, end) in zip(segment_paths, ranges)
+        ]
+        for fut in futures:
+            fut.result()
+
+    hasher = hashlib.sha256()
+    with open(part_path, "wb") as out:
+        for seg_path in segment_paths[: len(ranges)]:
+            with open(seg_path, "rb") as seg:
+                for chunk in iter(lambda: seg.read(COPY_BUFFER), b""):
+                    hasher.update(chunk)
+                    out.write(chunk)
+    for seg_path in segment_paths:
+        if os.path.exists(seg_path):
+            os.remove(seg_path)
+    return hasher.hexdigest()
+
+
 # ================= 主入口 (支持传参覆盖 YAML 配置) =================
 
 
@@ -159,7 +726,8 @@ def fetch_rss_main(
     year_from=None,
     year_end=None,
     latest_num=None,
-    clean_folder=True,
+    clean_folder=None,
+    on_feed_done=None,
 ):
     """
     参数说明:
@@ -167,20 +735,23 @@ def fetch_rss_main(
     - year_from: (Int) 自定义年份。如果不传，则使用 YAML 配置。
     - year_end: (Int) 自定义结束年份。如果不传，则使用 YAML 配置。
     - latest_num: (Int) 自定义数量。如果不传，则使用 YAML 配置。
-    - clean_folder: (Bool) 是否清空目录。默认为 True。
+    - clean_folder: (Bool) 是否清空目录。不传时: 增量模式 (incremental=true) 不清空，否则清空。
+    - on_feed_done: (Callable) 每个 feed 下载完成后回调 on_feed_done(栏目名)，流水线模式用它通知上传端。
     """
 
     # 1. 优先级逻辑：函数参数 > YAML全局配置
-    feeds_to_use = target_feeds if target_feeds is not None else RSS_FEEDS
-    year_to_use = year_from if year_from is not None else YEAR_FROM
-    year_end_to_use = year_end if year_end is not None else YEAR_END
-    num_to_use = latest_num if latest_num is not None else LATEST_NUM
+    feeds_to_use = target_feeds if target_feeds is not None else settings.RSS_FEEDS
+    year_to_use = year_from if year_from is not None else settings.YEAR_FROM
+    year_end_to_use = year_end if year_end is not None else settings.YEAR_END
+    num_to_use = latest_num if latest_num is not None else settings.LATEST_NUM
+    if clean_folder is None:
+        clean_folder = not settings.INCREMENTAL
 
     # 2. 清理目录逻辑
-    if clean_folder and os.path.exists(DOWNLOAD_FOLDER):
-        print(f"🧹 检测到旧目录 [{DOWNLOAD_FOLDER}]，正在彻底删除...")
+    if clean_folder and os.path.exists(settings.DOWNLOAD_FOLDER):
+        print(f"🧹 检测到旧目录 [{settings.DOWNLOAD_FOLDER}]，正在彻底删除...")
         try:
-            shutil.rmtree(DOWNLOAD_FOLDER)
+            shutil.rmtree(settings.DOWNLOAD_FOLDER)
             print("✅ 旧目录已清理完成")
         except Exception as e:
             print(f"⚠️ 删除旧目录失败: {e}")
@@ -190,28 +761,91 @@ def fetch_rss_main(
         f"=== 开始 RSS 下载任务 (年份范围 {year_to_use} - {year_end_to_use}, 数量={num_to_use}) ==="
     )
 
-    for name, url in feeds_to_use.items():
-        print(f"\n📥 处理 {name} ...")
-        data = parse_rss(url)
-        if not data:
-            print(f"⚠️  无数据: {name}")
-            continue
+    started = time.time()
+    feed_cache.reset_stats()
+    feed_items = list(feeds_to_use.items())
+    workers = min(max(int(settings.FETCH_WORKERS or 1), 1), max(len(feed_items), 1))
+
+    if workers == 1:
+        for name, url in feed_items:
+            _process_feed(name, url, year_to_use, year_end_to_use, num_to_use)
+            if on_feed_done:
+                on_feed_done(name)
+    else:
+        print(f"⚡ 并发模式: {workers} 个线程同时处理 {len(feed_items)} 个 feed")
+        with grouped_output() as router, ThreadPoolExecutor(max_workers=workers) as pool:
+            def run_feed(name, url):
+                text, _ = router.run_captured(
+                    _process_feed, name, url, year_to_use, year_end_to_use, num_to_use
+                )
+                if on_feed_done:
+                    on_feed_done(name)
+                return text
+
+            futures = [pool.submit(run_feed, name, url) for name, url in feed_items]
+            # 按配置顺序依次输出，每个 feed 的日志保持成组
+            for fut in futures:
+                router.target.write(fut.result())
+                router.target.flush()
+
+    print(f"\n=== 下载任务结束 (耗时 {time.time() - started:.1f}s) ===")
+    print(f"📦 Feed 缓存: 命中 {feed_cache.hits} 个, 未命中 {feed_cache.misses} 个")
+    host_lines = scheduler.summary_lines()
+    if host_lines:
+        print("🌐 按 host 统计 (自适应并发):")
+        for line in host_lines:
+            print(f"   {line}")
+
+
+def _process_feed(name, url, year_from_limit, year_end_limit, num_limit):
+    """处理单个 feed：解析 RSS -> 导出 Excel -> 下载音频，返回解析出的条目"""
+    with tracing.context(feed=name):
+        return _process_feed_inner(name, url, year_from_limit, year_end_limit, num_limit)
+
+
+def fetch_one_feed(name, url, year_from=None, year_end=None, latest_num=None):
+    """
+    只处理一个 feed (不清空目录)，返回解析出的条目；守护模式按 feed 单独调度时使用。
+    年份 / 数量不传时使用 YAML 配置。
+    """
+    return _process_feed(
+        name,
+        url,
+        year_from if year_from is not None else settings.YEAR_FROM,
+        year_end if year_end is not None else settings.YEAR_END,
+        latest_num if latest_num is not None else settings.LATEST_NUM,
+    )
+
+
+def _process_feed_inner(name, url, year_from_limit, year_end_limit, num_limit):
+    print(f"\n📥 处理 {name} ...")
+    data = parse_rss(url, year_from_limit, year_end_limit, num_limit)
+    if not data:
+        print(f"⚠️  无数据: {name}")
+        return []
 
-        out_dir = os.path.join(DOWNLOAD_FOLDER, name)
-        os.makedirs(out_dir, exist_ok=True)
+    out_dir = os.path.join(settings.DOWNLOAD_FOLDER, name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    with tracing.span("excel"):
+        import pandas as pd
 
         df = pd.DataFrame(data)
         excel_path = os.path.join(out_dir, f"{name}.xlsx")
         df.to_excel(excel_path, index=False)
 
-        # 传入确定好的参数
-        download_audios(
-            data,
-            subfolder=name,
-            year_from_limit=year_to_use,
-            year_end_limit=year_end_to_use,
-            num_limit=num_to_use,
-        )
-        print(f"✅ {name} 处理完成")
+    # 传入确定好的参数
+    download_audios(
+        data,
+        subfolder=name,
+        year_from_limit=year_from_limit,
+        year_end_limit=year_end_limit,
+        num_limit=num_limit,
+    )
+    if (settings.TRANSCODE or {}).get("enabled"):
+        # 可选: 转成低码率单声道，减少上传字节数 (文件名不变)
+        from transcode import transcode_folder
 
-    print("\n=== 下载任务结束 ===")
+        transcode_folder(out_dir)
+    print(f"✅ {name} 处理完成")
+    return data
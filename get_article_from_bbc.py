@@ -4,21 +4,40 @@ Fetch a BBC Six-Minute English episode, convert its rich-text content to Markdow
 and prepend a 6-digit numeric timestamp and cleaned title as the first H1 heading.
 Saves to a file named `articles/<timestamp>_<PascalCaseTitle>.md`.
 Added extra newline between elements for better Notion import spacing.
+
+Raw HTML is kept in a content-addressed cache (`.cache/bbc_html/<sha256>.html`) and
+revalidated with ETag / Last-Modified, so re-running only costs a conditional request;
+Markdown is regenerated only when the page content actually changed.
+Use `fetch_articles(urls)` to scrape many episodes concurrently over one session.
 """
 from __future__ import annotations
 
+import hashlib
 import re
+import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Union
+from typing import Dict, List, Optional, TextIO, Tuple, Union
 
 import requests
-from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag, UnicodeDammit
+
+from json_store import JsonStore
 
-__all__ = ["fetch_article"]
+__all__ = [
+    "fetch_article",
+    "fetch_articles",
+    "render_article",
+    "render_article_fast",
+    "HtmlCache",
+]
 
 BBC_EP_DEFAULT = (
     "https://www.bbc.co.uk/learningenglish/english/features/6-minute-english_2025/ep-250612"
 )
+USER_AGENT = "fetch_article/6.2"
+HTML_CACHE_DIR = Path(".cache") / "bbc_html"
+ARTICLES_DIR = Path("articles")
 
 # ---------------------------------------------------------------------------
 # HTML-to-Markdown helpers
@@ -79,27 +98,194 @@ def _node_to_md(node: Union[Tag, NavigableString], out: List[str]) -> None:
         _node_to_md(c, out)
 
 # ---------------------------------------------------------------------------
-# Public API
+# HTML cache
 # ---------------------------------------------------------------------------
 
-def fetch_article(
-    url: str = BBC_EP_DEFAULT,
-) -> str:
-    """Fetch URL, scrape content, and save Markdown with timestamped filename."""
-    # Download page
-    resp = requests.get(
-        url,
-        headers={"User-Agent": "fetch_article/6.2"},
-        timeout=20,
-    )
+class HtmlCache:
+    """Content-addressed store of raw article HTML plus a per-URL index.
+
+    The index maps URL -> {etag, last_modified, sha256, md_path}; blobs are
+    stored once per content hash, so identical pages share a file.
+    """
+
+    def __init__(self, root: Path = HTML_CACHE_DIR) -> None:
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self._store = JsonStore(str(self.index_path))
+        self._lock = self._store.lock
+        self._index: Dict[str, dict] = self._store.load()
+
+    def entry(self, url: str) -> Optional[dict]:
+        with self._lock:
+            return self._index.get(url)
+
+    def read(self, sha256: str) -> Optional[bytes]:
+        try:
+            return (self.root / f"{sha256}.html").read_bytes()
+        except OSError:
+            return None
+
+    def store(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str]) -> str:
+        digest = hashlib.sha256(body).hexdigest()
+        blob = self.root / f"{digest}.html"
+        if not blob.exists():
+            self.root.mkdir(parents=True, exist_ok=True)
+            blob.write_bytes(body)
+        with self._lock:
+            entry = self._index.setdefault(url, {})
+            entry.update(sha256=digest, etag=etag, last_modified=last_modified)
+        return digest
+
+    def set_markdown(self, url: str, sha256: str, md_path: Path) -> None:
+        with self._lock:
+            entry = self._index.setdefault(url, {})
+            entry.update(md_path=str(md_path), md_sha256=sha256)
+
+    def save(self) -> None:
+        self._store.save()
+
+
+def _make_session(pool_size: int = 8) -> requests.Session:
+    session = requests.Session()
+    session.headers.update({"User-Agent": USER_AGENT})
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _download_html(url: str, session: requests.Session, cache: HtmlCache) -> Tuple[bytes, str]:
+    """Conditional GET against the cache; returns (html bytes, sha256)."""
+    entry = cache.entry(url) or {}
+    headers = {}
+    cached_body = cache.read(entry["sha256"]) if entry.get("sha256") else None
+    if cached_body is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    resp = session.get(url, headers=headers, timeout=20)
+    if resp.status_code == 304 and cached_body is not None:
+        return cached_body, entry["sha256"]
     resp.raise_for_status()
+    digest = cache.store(
+        url, resp.content, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    )
+    return resp.content, digest
+
+# ---------------------------------------------------------------------------
+# Fast iterative engine
+# ---------------------------------------------------------------------------
+#
+# Same output as _node_to_md for the same parse tree, but walks the tree with an
+# explicit stack (no recursion limit on deeply nested pages), only runs the bold
+# regexes on tags whose class/style mention "bold", and streams top-level text
+# straight to the writer instead of building the page in memory.
+# Parsing dominates the run time, and on a real episode page the rich-text
+# widget is a small part of the HTML (scripts, nav, related-episode lists, footer),
+# so the parser only builds the two widgets we read (_STRAIN) and the <title> is
+# pulled out separately; see bench_markdown.py. Bold runs are buffered because
+# their text is stripped before wrapping; "_" is removed only when text reaches
+# the writer, exactly like the global replace in the classic path.
+
+_HEADINGS = {"h1": "# ", "h2": "## ", "h3": "### ", "h4": "#### "}
+_BLOCKS = {"p", "li"}
+_END = object()
+_WIDGETS = {"widget-richtext", "widget-bbcle-featuresubheader"}
+_STRAIN = SoupStrainer(class_=lambda cl: cl is not None and not _WIDGETS.isdisjoint(cl.split()))
+_RE_TITLE = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.I | re.S)
+
+
+def _is_bold_fast(tag: Tag, name: str) -> bool:
+    if name in {"b", "strong"}:
+        return True
+    classes = tag.get("class")
+    if classes and any("bold" in c.lower() and _RE_BOLD_CLASS.search(c) for c in classes):
+        return True
+    style = tag.get("style")
+    if style and "bold" in style.lower() and _RE_BOLD_STYLE.search(style):
+        return True
+    return False
+
+
+def _stream_md(nodes, write) -> None:
+    """Convert nodes to Markdown, calling write(text) with "_" already removed."""
+    buffers: List[List[str]] = []
+    stack = [(iter(nodes), None)]
+
+    def emit(text: str) -> None:
+        if buffers:
+            buffers[-1].append(text)
+        elif text:
+            write(text.replace("_", ""))
+
+    while stack:
+        node = next(stack[-1][0], _END)
+        if node is _END:
+            _, closer = stack.pop()
+            if closer is _append_bold:
+                text = "".join(buffers.pop()).strip()
+                if text:
+                    emit(f"**{text}**")
+            elif closer:
+                emit(closer)
+            continue
+        if isinstance(node, NavigableString):
+            emit(str(node))
+            continue
+        name = node.name.lower()
+        if name == "hr":
+            continue
+        if _is_bold_fast(node, name):
+            buffers.append([])
+            stack.append((iter(node.contents), _append_bold))
+        elif name == "br":
+            emit("  \n")
+        elif name in _HEADINGS:
+            emit(_HEADINGS[name])
+            stack.append((iter(node.contents), "\n\n\n"))
+        elif name in _BLOCKS:
+            stack.append((iter(node.contents), "\n\n\n"))
+        else:
+            stack.append((iter(node.contents), None))
+
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+def _check_parser(parser: str) -> None:
+    """Only html.parser is guaranteed to match render_article byte for byte."""
+    if parser != "html.parser":
+        warnings.warn(
+            f"parser={parser!r} builds a different tree from html.parser on malformed "
+            "HTML (unclosed <p>, blocks inside <p>, CRLF); Markdown may differ from "
+            "render_article",
+            stacklevel=3,
+        )
 
-    # Extract raw title
-    raw_title = ""
-    if soup.head and soup.head.title:
-        raw_title = soup.head.title.get_text(strip=True)
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def _parse_page(
+    html: Union[str, bytes], parser: str = "html.parser", strain: bool = False
+) -> Tuple[str, Tag, Path]:
+    """Parse a page; returns (H1 header line, rich-text container, target filename).
+
+    With `strain`, only the featuresubheader / rich-text widgets are built into
+    the tree and the title is read from the raw <title> element.
+    """
+    if strain:
+        if isinstance(html, bytes):
+            html = UnicodeDammit(html, is_html=True).unicode_markup
+        soup = BeautifulSoup(html, parser, parse_only=_STRAIN)
+        m = _RE_TITLE.search(html)
+        raw_title = BeautifulSoup(m.group(1), parser).get_text(strip=True) if m else ""
+    else:
+        soup = BeautifulSoup(html, parser)
+
+        # Extract raw title
+        raw_title = ""
+        if soup.head and soup.head.title:
+            raw_title = soup.head.title.get_text(strip=True)
     prefix = "BBC Learning English - 6 Minute English /"
     title = raw_title[len(prefix):].strip() if raw_title.startswith(prefix) else raw_title
 
@@ -123,36 +309,135 @@ def fetch_article(
     if not container:
         raise RuntimeError("Rich-text container not found.")
 
+    header = f"# {timestamp} - {title}\n\n" if timestamp else f"# {title}\n\n"
+
+    # Generate filename: articles/<timestamp>_<PascalCaseTitle>.md
+    words = re.findall(r"[A-Za-z0-9]+", title)
+    pascal = ''.join(word.capitalize() for word in words) or "Episode"
+    filename = ARTICLES_DIR / (f"{timestamp}_{pascal}.md" if timestamp else f"{pascal}.md")
+    return header, container, filename
+
+
+def render_article(html: Union[str, bytes]) -> Tuple[str, Path]:
+    """Convert an episode page to Markdown; returns (markdown, target filename)."""
+    header, container, filename = _parse_page(html)
+
     # Convert HTML to Markdown
     md_parts: List[str] = []
     for child in container.children:
         _node_to_md(child, md_parts)
 
-    # Build Markdown content
-    header = []
-    if timestamp:
-        header.append(f"# {timestamp} - {title}\n\n")
-    else:
-        header.append(f"# {title}\n\n")
     content_md = "".join(md_parts).replace("_", "")
-    markdown = "".join(header) + content_md
+    return header + content_md, filename
 
-    # Generate filename: articles/<timestamp>_<PascalCaseTitle>.md
-    words = re.findall(r"[A-Za-z0-9]+", title)
-    pascal = ''.join(word.capitalize() for word in words) or "Episode"
-    
-    # 创建 articles 目录（如果不存在）
-    articles_dir = Path("articles")
-    articles_dir.mkdir(exist_ok=True)
-    
-    # 在 articles 目录下保存文件
-    filename = articles_dir / (f"{timestamp}_{pascal}.md" if timestamp else f"{pascal}.md")
-
-    # Write to file
-    filename.write_text(markdown, encoding="utf-8")
-    print(f"Article saved to: {filename}")
+
+def render_article_fast(
+    html: Union[str, bytes],
+    out: Optional[TextIO] = None,
+    parser: str = "html.parser",
+) -> Tuple[Optional[str], Path]:
+    """Iterative engine; same Markdown as render_article.
+
+    With `out`, Markdown is streamed to the file object and None is returned in
+    place of the text. Any `parser` other than html.parser (e.g. lxml) is faster
+    but only opt-in: its output can differ on malformed pages.
+    """
+    _check_parser(parser)
+    header, container, filename = _parse_page(html, parser, strain=True)
+    if out is not None:
+        out.write(header)
+        _stream_md(container.contents, out.write)
+        return None, filename
+    parts = [header]
+    _stream_md(container.contents, parts.append)
+    return "".join(parts), filename
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def fetch_article(
+    url: str = BBC_EP_DEFAULT,
+    session: Optional[requests.Session] = None,
+    cache: Optional[HtmlCache] = None,
+    engine: str = "classic",
+    parser: str = "html.parser",
+) -> Optional[str]:
+    """Fetch URL, scrape content, and save Markdown with timestamped filename.
+
+    The Markdown file is only rewritten when the page HTML changed since the
+    last run (or the file is missing). engine="fast" streams the output into
+    the file with render_article_fast and returns None instead of the text;
+    `parser` only applies to that engine.
+    """
+    own_cache = cache is None
+    session = session or _make_session(1)
+    cache = cache or HtmlCache()
+
+    html, digest = _download_html(url, session, cache)
+    entry = cache.entry(url) or {}
+    md_path = Path(entry["md_path"]) if entry.get("md_path") else None
+    markdown = None
+    if entry.get("md_sha256") == digest and md_path is not None and md_path.exists():
+        print(f"Article unchanged: {md_path}")
+        if engine != "fast":
+            markdown = md_path.read_text(encoding="utf-8")
+    elif engine == "fast":
+        # 文件名要解析完才知道：先写 .tmp，成功后再改名 (解析失败不会留下半个 .md)
+        ARTICLES_DIR.mkdir(exist_ok=True)
+        tmp_path = ARTICLES_DIR / f".{digest}.md.tmp"
+        try:
+            with tmp_path.open("w", encoding="utf-8") as f:
+                _, md_path = render_article_fast(html, out=f, parser=parser)
+            tmp_path.replace(md_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        cache.set_markdown(url, digest, md_path)
+        print(f"Article saved to: {md_path}")
+    else:
+        markdown, md_path = render_article(html)
+        # 创建 articles 目录（如果不存在）
+        md_path.parent.mkdir(exist_ok=True)
+        md_path.write_text(markdown, encoding="utf-8")
+        cache.set_markdown(url, digest, md_path)
+        print(f"Article saved to: {md_path}")
+
+    if own_cache:
+        cache.save()
     return markdown
 
+
+def fetch_articles(
+    urls: List[str],
+    max_workers: int = 8,
+    engine: str = "classic",
+    parser: str = "html.parser",
+) -> Dict[str, Union[str, None, Exception]]:
+    """Fetch many episodes concurrently over one pooled session.
+
+    Returns {url: markdown} (None with engine="fast"); failed URLs map to the
+    exception instead of aborting the whole batch.
+    """
+    session = _make_session(max_workers)
+    cache = HtmlCache()
+    results: Dict[str, Union[str, None, Exception]] = {}
+
+    def run(url: str) -> None:
+        try:
+            results[url] = fetch_article(
+                url, session=session, cache=cache, engine=engine, parser=parser
+            )
+        except Exception as exc:  # keep going, report at the end
+            print(f"Failed: {url} ({exc})")
+            results[url] = exc
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(run, urls))
+    finally:
+        cache.save()
+    return results
+
 if __name__ == "__main__":
     print(fetch_article())
 
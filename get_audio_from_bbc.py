@@ -1,66 +1,182 @@
-import requests
-from bs4 import BeautifulSoup
+"""
+抓取 BBC 节目下载页 (BASE_URL?page=N) 上所有 128kbps 的 MP3
+- 翻页解析和下载都并发进行，线程数有上限
+- 按 host 复用连接池，1 MB 大块写入，先写 .part 完成后再改名
+- 下载前先 HEAD：本地已有同名且大小 (Content-Length) 一致的文件直接跳过
+- 每个 host 的请求间隔由限速器控制，取代固定的 sleep
+
+    python get_audio_from_bbc.py
+    python get_audio_from_bbc.py --page-workers 4 --download-workers 6 --rate 5
+"""
+
+import argparse
 import os
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from bs4 import BeautifulSoup
 
 BASE_URL = "https://www.bbc.co.uk/programmes/p02pc9s1/episodes/downloads"
 HEADERS = {"User-Agent": "Mozilla/5.0"}
+OUT_DIR = "audios"
+CHUNK_SIZE = 1024 * 1024
+
+
+class HostRateLimiter:
+    """每个 host 每秒最多 rate 个请求 (请求之间至少间隔 1/rate 秒)，线程安全"""
 
-def get_128kbps_links_from_page(page: int):
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next.get(host, now), now)
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def make_session(pool_size):
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_128kbps_links_from_page(session, limiter, page: int):
     url = f"{BASE_URL}?page={page}"
     print(f"📄 正在解析第 {page} 页: {url}")
-    resp = requests.get(url, headers=HEADERS)
+    limiter.wait(url)
+    resp = session.get(url, timeout=30)
     if resp.status_code != 200:
-        print(f"❌ 请求失败，状态码 {resp.status_code}")
+        print(f"❌ 第 {page} 页请求失败，状态码 {resp.status_code}")
         return []
 
     soup = BeautifulSoup(resp.text, "html.parser")
-    return soup.find_all("a", attrs={"aria-label": lambda v: v and "128kbps" in v})
+    links = []
+    for a in soup.find_all("a", attrs={"aria-label": lambda v: v and "128kbps" in v}):
+        href = a.get("href")
+        if not href:
+            continue
+        # 修复协议
+        if href.startswith("//"):
+            href = "https:" + href
+        links.append(href)
+    return links
+
 
 def extract_filename_from_response(resp, fallback_url):
     dispo = resp.headers.get("Content-Disposition", "")
     match = re.search(r'filename=\"?([^\";]+)\"?', dispo)
     if match:
         return match.group(1)
-    return fallback_url.split("/")[-1]
+    return urlparse(resp.url or fallback_url).path.split("/")[-1] or fallback_url.split("/")[-1]
 
-# 下载目录
-os.makedirs("audios", exist_ok=True)
 
-page = 1
-count = 0
+def download(session, limiter, href):
+    """下载一个 MP3，返回 "downloaded" / "skipped" / "failed" """
+    try:
+        # HEAD 拿文件名和大小，本地已有且大小一致就跳过
+        limiter.wait(href)
+        head = session.head(href, allow_redirects=True, timeout=30)
+        filename = extract_filename_from_response(head, href)
+        filepath = os.path.join(OUT_DIR, filename)
+        length = head.headers.get("Content-Length")
+        expected = int(length) if length and length.isdigit() else None
+        if os.path.exists(filepath) and (
+            expected is None or os.path.getsize(filepath) == expected
+        ):
+            print(f"⏭️ 已存在: {filename}")
+            return "skipped"
 
-while True:
-    links = get_128kbps_links_from_page(page)
-    if not links:
-        print("✅ 没有更多链接，下载结束。")
-        break
+        print(f"🎧 下载: {filename}")
+        part_path = filepath + ".part"
+        limiter.wait(href)
+        with session.get(href, stream=True, timeout=60) as resp:
+            resp.raise_for_status()
+            with open(part_path, "wb") as f:
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    f.write(chunk)
+        if expected is not None and os.path.getsize(part_path) != expected:
+            raise IOError(f"文件不完整: {os.path.getsize(part_path)}/{expected} 字节")
+        os.replace(part_path, filepath)
+        return "downloaded"
+    except Exception as e:
+        print(f"⚠️ 下载失败: {href} - 错误: {e}")
+        return "failed"
 
-    for link in links:
-        href = link.get("href")
-        if not href:
-            continue
-        # 修复协议
-        if href.startswith("//"):
-            href = "https:" + href
 
-        try:
-            resp = requests.get(href, stream=True, headers=HEADERS)
-            filename = extract_filename_from_response(resp, href)
-            filepath = os.path.join("audios", filename)
+def crawl(page_workers=4, download_workers=6, rate=5.0):
+    os.makedirs(OUT_DIR, exist_ok=True)
+    session = make_session(page_workers + download_workers)
+    limiter = HostRateLimiter(rate)
 
-            # 下载并保存文件
-            print(f"🎧 下载: {filename}")
-            with open(filepath, "wb") as f:
-                for chunk in resp.iter_content(chunk_size=1024):
-                    f.write(chunk)
-            count += 1
-        except Exception as e:
-            print(f"⚠️ 下载失败: {href} - 错误: {e}")
+    seen = set()
+    lock = threading.Lock()
+    state = {"next_page": 1, "last_page": None}
+    futures = []
+
+    with ThreadPoolExecutor(max_workers=download_workers) as downloads:
+
+        def page_worker():
+            while True:
+                with lock:
+                    page = state["next_page"]
+                    # 已经遇到空页，后面的页不用再请求
+                    if state["last_page"] is not None and page > state["last_page"]:
+                        return
+                    state["next_page"] += 1
+                links = get_128kbps_links_from_page(session, limiter, page)
+                with lock:
+                    if not links:
+                        last = state["last_page"]
+                        state["last_page"] = page - 1 if last is None else min(last, page - 1)
+                        return
+                    for href in links:
+                        if href not in seen:
+                            seen.add(href)
+                            futures.append(downloads.submit(download, session, limiter, href))
+
+        page_threads = [
+            threading.Thread(target=page_worker, name=f"page-{i}") for i in range(page_workers)
+        ]
+        for t in page_threads:
+            t.start()
+        for t in page_threads:
+            t.join()
+        print(f"✅ 翻页结束，共 {state['last_page']} 页，{len(seen)} 个链接")
+
+        results = [f.result() for f in futures]
+
+    return {status: results.count(status) for status in ("downloaded", "skipped", "failed")}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="并发抓取 BBC 节目 128kbps MP3")
+    ap.add_argument("--page-workers", type=int, default=4, help="同时解析的页数")
+    ap.add_argument("--download-workers", type=int, default=6, help="同时下载的文件数")
+    ap.add_argument("--rate", type=float, default=5.0, help="每个 host 每秒最多请求数 (0 = 不限)")
+    args = ap.parse_args()
 
-        time.sleep(0.5)  # 防止过快请求
+    started = time.time()
+    stats = crawl(args.page_workers, args.download_workers, args.rate)
+    print(
+        f"\n✅ 共下载 {stats['downloaded']} 个 MP3 文件，跳过 {stats['skipped']} 个已存在，"
+        f"失败 {stats['failed']} 个，保存在 {OUT_DIR}/ (耗时 {time.time() - started:.1f}s)"
+    )
 
-    page += 1
 
-print(f"\n✅ 共下载 {count} 个 MP3 文件，保存在文件夹中。")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
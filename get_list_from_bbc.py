@@ -52,11 +52,13 @@ if __name__ == "__main__":
     articles.sort(key=lambda x: parse_date(x['date']), reverse=True)
     lines = []
     print(f"共获取到 {len(articles)} 篇文章")
+    # 并发抓取全部文章；HTML 有缓存，内容没变的文章不会重新生成 Markdown；
+    # fast 引擎只解析正文 widget，直接流式写文件 (tests/test_markdown_golden.py 保证和 classic 输出一致)
+    get_article_from_bbc.fetch_articles([art['url'] for art in articles], engine="fast")
     for art in articles:
         lines.append(art['title'])
         lines.append(art['date'])
         lines.append(art['url'])
-        get_article_from_bbc.fetch_article(art['url'])
         lines.append('')
     with open('bbc_6min_list.txt', 'w', encoding='utf-8') as f:
         f.write('\n'.join(lines))
@@ -0,0 +1,181 @@
+"""
+按 host 自适应并发 (AIMD)
+========================
+config.yaml 里的 feed 分布在完全不同的站点上 (bbci.co.uk / megaphone.fm / libsyn.com / apple.news)，
+一个固定的并发数对 CDN 太保守，对小站点又容易被限流。这里给每个 host 单独维护并发上限：
+
+- 加性增: 请求成功且响应头在 slow_ms 内返回，上限每次 +1/上限 (大约每一轮并发 +1)，不超过 max
+- 乘性减: 429 / 5xx / 超时 / 连接错误时上限减半，不低于 min
+- 响应带 Retry-After 时，这个 host 在指定时间之前不再发新请求
+- 统计每个 host 的请求数、错误数、限流次数、平均响应时间、峰值并发，在下载汇总里打印
+
+    with scheduler.request(url) as req:
+        resp = session.get(url, stream=True)
+        req.response(resp)
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from settings import settings
+
+DEFAULT_HOST_CONCURRENCY = {
+    # 每个 host 的初始 / 最小 / 最大并发请求数
+    "initial": 2,
+    "min": 1,
+    "max": 8,
+    # 响应头超过这个时间 (毫秒) 才返回，不再加并发
+    "slow_ms": 5000,
+    # Retry-After 最多等多久 (秒)，防止服务器给出离谱的值
+    "max_retry_after_s": 300,
+}
+
+THROTTLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+def _retry_after_seconds(value):
+    """Retry-After 可以是秒数，也可以是 HTTP 日期"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter:
+    """单个 host 的并发闸门和统计"""
+
+    def __init__(self, host, options):
+        self.host = host
+        self.options = options
+        self.limit = float(options["initial"])
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._cond = threading.Condition()
+        # 统计
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.latency_total = 0.0
+        self.peak = 0
+        self.wait_seconds = 0.0
+
+    def acquire(self):
+        started = time.time()
+        with self._cond:
+            while True:
+                delay = self.blocked_until - time.time()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                if self.in_flight < int(self.limit):
+                    break
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self.wait_seconds += time.time() - started
+
+    def release(self, ok, latency=None, retry_after=None):
+        with self._cond:
+            self.in_flight -= 1
+            self.requests += 1
+            if latency is not None:
+                self.latency_total += latency
+            if ok:
+                if latency is None or latency * 1000 < self.options["slow_ms"]:
+                    self.limit = min(self.limit + 1.0 / self.limit, float(self.options["max"]))
+            else:
+                self.errors += 1
+                self.limit = max(self.limit / 2, float(self.options["min"]))
+            if retry_after:
+                self.throttled += 1
+                wait = min(retry_after, self.options["max_retry_after_s"])
+                self.blocked_until = max(self.blocked_until, time.time() + wait)
+            self._cond.notify_all()
+
+    def summary(self):
+        avg_ms = self.latency_total / self.requests * 1000 if self.requests else 0.0
+        return (
+            f"{self.host}: 请求 {self.requests} 次, 错误 {self.errors}, 限流 {self.throttled}, "
+            f"平均响应 {avg_ms:.0f} ms, 峰值并发 {self.peak}, 当前上限 {int(self.limit)}, "
+            f"排队 {self.wait_seconds:.1f}s"
+        )
+
+
+class _Request:
+    """一次请求的结果记录，由调用方在拿到响应头时调用 response()"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.latency = None
+        self.ok = True
+        self.retry_after = None
+
+    def response(self, resp):
+        self.latency = time.time() - self.started
+        if resp.status_code in THROTTLE_STATUSES:
+            self.ok = False
+            self.retry_after = _retry_after_seconds(resp.headers.get("Retry-After"))
+
+
+class HostScheduler:
+    """所有 host 的限流器登记处，线程安全"""
+
+    def __init__(self, options=None):
+        self._options = options
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @property
+    def options(self):
+        if self._options is None:
+            self._options = dict(DEFAULT_HOST_CONCURRENCY)
+            self._options.update(settings.HOST_CONCURRENCY or {})
+        return self._options
+
+    def limiter(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is None:
+                limiter = self._hosts[host] = HostLimiter(host, self.options)
+            return limiter
+
+    @contextmanager
+    def request(self, url):
+        """
+        占用 url 所在 host 的一个并发名额。
+        拿到响应头之前抛出的异常 (超时 / 连接错误) 记为失败；拿到响应头之后由状态码决定，
+        这样 404 之类触发的 raise_for_status 不会拖慢整个 host。
+        """
+        limiter = self.limiter(url)
+        limiter.acquire()
+        req = _Request()
+        try:
+            yield req
+        except BaseException:
+            if req.latency is None:
+                req.ok = False
+            raise
+        finally:
+            limiter.release(req.ok, req.latency, req.retry_after)
+
+    def summary_lines(self):
+        with self._lock:
+            hosts = sorted(self._hosts.values(), key=lambda h: h.host)
+        return [h.summary() for h in hosts if h.requests]
+
+    def reset(self):
+        with self._lock:
+            self._hosts.clear()
+            self._options = None
+
+
+scheduler = HostScheduler()
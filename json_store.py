@@ -0,0 +1,53 @@
+"""
+JSON 字典文件 (JsonStore)
+========================
+feed 缓存、远端标题快照、转码索引、BBC 文章 HTML 索引共用的小工具：
+
+- 第一次使用时才读文件；文件不存在或损坏时从空字典开始
+- 路径可以延迟到第一次使用时再从 settings 读取 (setting="FEED_CACHE_FILE")，
+  这样模块级实例不会在导入时就解析 config.yaml
+- save() 先写 <path>.tmp 再 os.replace，中途崩溃不会留下半个文件
+- lock 是可重入锁，调用方在 load() -> 修改 -> save() 这一整段外面持有它
+"""
+
+import json
+import os
+import threading
+
+
+class JsonStore:
+    def __init__(self, path=None, setting=None):
+        self._path = path
+        self._setting = setting
+        self._data = None
+        self.lock = threading.RLock()
+
+    @property
+    def path(self):
+        if self._path is None:
+            from settings import settings
+
+            self._path = getattr(settings, self._setting)
+        return self._path
+
+    def load(self):
+        """返回内存里的字典 (第一次调用时从磁盘读入)"""
+        with self.lock:
+            if self._data is None:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._data = json.load(f)
+                except (OSError, ValueError):
+                    self._data = {}
+            return self._data
+
+    def save(self):
+        with self.lock:
+            data = self.load()
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
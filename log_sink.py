@@ -0,0 +1,178 @@
+"""
+队列化日志输出 (替代每次 write 都 flush 的 Tee)
+=============================================
+- write() 只把文本放进队列，后台线程批量写入控制台和日志文件，
+  最多每 flush_interval 秒 flush 一次，不再每个 print 片段都触发系统调用
+- close() / 进程退出 (atexit) / 程序崩溃时都会把队列里剩下的内容写完再 flush
+- 日志超过 max_bytes 时自动轮转，轮转出来的旧文件用 gzip 压缩
+- compress_old_logs() 把 LOG_DIR 下已经结束的运行留下的日志压缩成 .gz
+"""
+
+import atexit
+import gzip
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+
+_STOP = object()
+
+
+def gzip_file(path):
+    """把 path 压缩成 path.gz 并删除原文件"""
+    with open(path, "rb") as src, gzip.open(path + ".gz", "wb") as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.remove(path)
+
+
+_PID_RE = re.compile(r"-(\d+)(?:\.\d+)?\.(?:txt|jsonl)$")
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def compress_old_logs(log_dir, keep=(), min_age_s=3600):
+    """
+    压缩 log_dir 下以前运行留下的日志 (.txt / .jsonl)，keep 里的文件除外。
+    文件名里带 pid (mm.dd.hh.mm.ss-<pid>.txt) 且进程还活着的跳过 —— 守护进程或同时在跑的另一次运行
+    还在往里写；文件名里没有 pid 的旧日志，最近 min_age_s 秒内还被修改过的也跳过。
+    """
+    keep = {os.path.abspath(p) for p in keep}
+    now = time.time()
+    for name in os.listdir(log_dir):
+        path = os.path.join(log_dir, name)
+        if not name.endswith((".txt", ".jsonl")) or os.path.abspath(path) in keep:
+            continue
+        match = _PID_RE.search(name)
+        try:
+            if match:
+                if _pid_alive(int(match.group(1))):
+                    continue
+            elif now - os.path.getmtime(path) < min_age_s:
+                continue
+            gzip_file(path)
+        except OSError as e:
+            print(f"⚠️  压缩旧日志失败 {name}: {e}")
+
+
+class QueuedLogSink:
+    """同时写控制台和日志文件的文件对象，可以直接赋给 sys.stdout / sys.stderr"""
+
+    def __init__(self, console, log_path, flush_interval=0.5, max_bytes=20 * 1024 * 1024):
+        self.console = console
+        self.log_path = log_path
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.encoding = "utf-8"
+        self._file = open(log_path, "a", encoding="utf-8")
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        self._rotations = 0
+        self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # ---------- 文件对象接口 ----------
+
+    def write(self, data):
+        if data:
+            if self._closed:
+                self.console.write(data)
+            else:
+                self._queue.put(data)
+        return len(data)
+
+    def flush(self, timeout=5):
+        """等后台线程把目前为止的内容都写出去"""
+        if self._closed:
+            self.console.flush()
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def isatty(self):
+        return False
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout=10)
+        self._file.close()
+
+    # ---------- 后台线程 ----------
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush_streams()
+                last_flush = time.monotonic()
+                continue
+
+            pending, waiters, stop = [], [], False
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    pending.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if pending:
+                self._write("".join(pending))
+            if waiters or stop or time.monotonic() - last_flush >= self.flush_interval:
+                self._flush_streams()
+                last_flush = time.monotonic()
+            for event in waiters:
+                event.set()
+            if stop:
+                return
+
+    def _write(self, text):
+        try:
+            self.console.write(text)
+        except Exception:
+            pass
+        self._file.write(text)
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def _flush_streams(self):
+        for stream in (self.console, self._file):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+
+    def _rotate(self):
+        """当前文件改名为 <名字>.<序号><扩展名> 并 gzip，然后继续写新文件"""
+        self._file.close()
+        self._rotations += 1
+        stem, ext = os.path.splitext(self.log_path)
+        rotated = f"{stem}.{self._rotations}{ext}"
+        os.replace(self.log_path, rotated)
+        try:
+            gzip_file(rotated)
+        except OSError:
+            pass
+        self._file = open(self.log_path, "a", encoding="utf-8")
@@ -1,25 +1,104 @@
+import argparse
+import queue
 import sys
+import threading
 
-from auto_upload import log_to_file, run_uploader
-from fetch_rss import ENABLE_FETCH, ENABLE_UPLOAD, fetch_rss_main
+import tracing
 
+from settings import settings
+
+# fetch_rss / auto_upload 只在对应阶段开始时导入，
+# 只下载或只上传的时候不用付另一边依赖的启动时间。
+
+
+def run_pipeline():
+    """
+    流水线模式：下载线程每完成一个栏目就放进有界队列，上传端 (主线程，Playwright 要求) 立刻开始处理。
+    总耗时接近 max(下载, 上传)，而不是两者之和。
+    """
+    from auto_upload import run_uploader, scan_local_channels
+    from fetch_rss import fetch_rss_main
+
+    channel_queue = queue.Queue(maxsize=max(int(settings.PIPELINE_QUEUE_SIZE), 1))
+
+    def producer():
+        try:
+            fetch_rss_main(on_feed_done=channel_queue.put)
+        finally:
+            channel_queue.put(None)  # 结束标记
+
+    finished = threading.Event()
+
+    def ready_channels():
+        seen = set()
+        for name in iter(channel_queue.get, None):
+            seen.add(name)
+            yield name
+        finished.set()
+        # 下载全部结束后，再补上不在 rss_feeds 里的本地栏目 (手动放进来的文件夹)
+        for name in scan_local_channels():
+            if name not in seen:
+                yield name
+
+    fetch_thread = threading.Thread(target=producer, name="fetch", daemon=True)
+    fetch_thread.start()
+
+    try:
+        run_uploader(channels=ready_channels())
+    finally:
+        # 上传端提前退出 (包括上传失败时的 sys.exit) 时，把剩下的栏目取完，
+        # 否则下载线程池会一直卡在 put 上，解释器退出时等它们而挂住
+        if not finished.is_set():
+            for _ in iter(channel_queue.get, None):
+                pass
+        fetch_thread.join()
+
+
+def run_stages():
+    if settings.PIPELINE and settings.ENABLE_FETCH and settings.ENABLE_UPLOAD:
+        print("▶️ 流水线模式: 边下载边上传...")
+        run_pipeline()
+        return
+
+    if settings.ENABLE_FETCH:
+        from fetch_rss import fetch_rss_main
+
+        print("▶️ 开始下载任务...")
+        fetch_rss_main()
+    else:
+        print("⏭️ 已禁用下载 (enable_fetch=false)")
+
+    if settings.ENABLE_UPLOAD:
+        from auto_upload import run_uploader
+
+        print("▶️ 开始上传任务...")
+        run_uploader()
+    else:
+        print("⏭️ 已禁用上传 (enable_upload=false)")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="RSS 下载 + 每日英语听力自动上传")
+    ap.add_argument(
+        "--daemon", action="store_true", help="守护模式: 按 feed 单独轮询，新文件落地后只上传对应栏目"
+    )
+    args = ap.parse_args(argv)
+
+    from auto_upload import log_to_file
 
-def main():
     with log_to_file() as log_file_path:
         print(f"日志文件: {log_file_path}")
         print(sys.executable)
 
-        if ENABLE_FETCH:
-            print("▶️ 开始下载任务...")
-            fetch_rss_main()
-        else:
-            print("⏭️ 已禁用下载 (enable_fetch=false)")
-
-        if ENABLE_UPLOAD:
-            print("▶️ 开始上传任务...")
-            run_uploader()
-        else:
-            print("⏭️ 已禁用上传 (enable_upload=false)")
+        try:
+            if args.daemon:
+                from daemon import run_daemon
+
+                run_daemon()
+            else:
+                run_stages()
+        finally:
+            tracing.print_breakdown()
 
 
 if __name__ == "__main__":
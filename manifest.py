@@ -0,0 +1,242 @@
+"""
+本地 SQLite 下载清单 (manifest)
+===============================
+按 GUID (没有时用音频链接) 记录每一集的本地路径、大小、下载时间和上传状态，
+增量模式下只下载、只上传新内容，不再每次清空目录重新下载。
+下载时顺带记录音频的 sha256，不同栏目 / 不同标题下的同一份音频可以据此识别出来。
+
+命令行查询:
+    python manifest.py stats              # 每个栏目的 已下载 / 已上传 / 待上传 数量
+    python manifest.py pending [--feed X] # 列出待上传文件
+    python manifest.py dupes              # 列出内容相同 (sha256 一致) 的节目
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+
+from settings import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS episodes (
+    key           TEXT PRIMARY KEY,
+    feed          TEXT NOT NULL,
+    title         TEXT,
+    url           TEXT,
+    path          TEXT,
+    size          INTEGER,
+    downloaded_at REAL,
+    uploaded_at   REAL,
+    sha256        TEXT,
+    duplicate_of  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_episodes_path ON episodes (path);
+CREATE INDEX IF NOT EXISTS idx_episodes_feed ON episodes (feed);
+"""
+
+# 旧版本建的库缺少的列，打开时补上
+_ADDED_COLUMNS = {"sha256": "TEXT", "duplicate_of": "TEXT"}
+
+
+def _norm(path):
+    return os.path.abspath(path)
+
+
+class Manifest:
+    """线程安全的 SQLite 清单，连接在第一次使用时才打开"""
+
+    def __init__(self, path=None):
+        # path 不传时，第一次使用才从 settings.MANIFEST_FILE 读取
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        if self._conn is None:
+            self.path = self.path or settings.MANIFEST_FILE
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript(_SCHEMA)
+            columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(episodes)")}
+            for name, kind in _ADDED_COLUMNS.items():
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE episodes ADD COLUMN {name} {kind}")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_episodes_sha256 ON episodes (sha256)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key):
+        with self._lock:
+            return self._db().execute(
+                "SELECT * FROM episodes WHERE key = ?", (key,)
+            ).fetchone()
+
+    def record_download(
+        self, key, feed, title, url, path, size=None, sha256=None, duplicate_of=None
+    ):
+        """path 为 None 表示内容重复、本地没有保留文件 (duplicate_of 指向原始节目)"""
+        if size is None and path and os.path.exists(path):
+            size = os.path.getsize(path)
+        with self._lock, self._db() as db:
+            db.execute(
+                """
+                INSERT INTO episodes
+                    (key, feed, title, url, path, size, downloaded_at, sha256, duplicate_of)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    feed = excluded.feed, title = excluded.title, url = excluded.url,
+                    path = excluded.path, size = excluded.size,
+                    downloaded_at = excluded.downloaded_at,
+                    sha256 = excluded.sha256, duplicate_of = excluded.duplicate_of
+                """,
+                (
+                    key,
+                    feed,
+                    title,
+                    url,
+                    _norm(path) if path else None,
+                    size,
+                    time.time(),
+                    sha256,
+                    duplicate_of,
+                ),
+            )
+
+    def find_content(self, sha256, exclude_key=None):
+        """按 sha256 找最早记录的、本地文件还在的同内容节目，没有返回 None"""
+        with self._lock:
+            rows = self._db().execute(
+                """
+                SELECT * FROM episodes
+                WHERE sha256 = ? AND key != ? AND path IS NOT NULL
+                ORDER BY downloaded_at
+                """,
+                (sha256, exclude_key or ""),
+            ).fetchall()
+        for row in rows:
+            if os.path.exists(row["path"]):
+                return row
+        return None
+
+    def uploaded_elsewhere(self, path):
+        """
+        path 对应的音频内容是否已经以别的节目 (别的栏目或标题) 上传过，
+        返回那条记录，没有返回 None
+        """
+        with self._lock:
+            return self._db().execute(
+                """
+                SELECT other.* FROM episodes AS me
+                JOIN episodes AS other
+                  ON other.sha256 = me.sha256 AND other.key != me.key
+                WHERE me.path = ? AND me.sha256 IS NOT NULL
+                  AND other.uploaded_at IS NOT NULL
+                ORDER BY other.uploaded_at LIMIT 1
+                """,
+                (_norm(path),),
+            ).fetchone()
+
+    def duplicate_groups(self):
+        """内容相同 (sha256 一致) 的节目，按 sha256 分组"""
+        with self._lock:
+            return self._db().execute(
+                """
+                SELECT * FROM episodes WHERE sha256 IN (
+                    SELECT sha256 FROM episodes WHERE sha256 IS NOT NULL
+                    GROUP BY sha256 HAVING COUNT(*) > 1
+                ) ORDER BY sha256, downloaded_at
+                """
+            ).fetchall()
+
+    def is_uploaded(self, path):
+        with self._lock:
+            row = self._db().execute(
+                "SELECT uploaded_at FROM episodes WHERE path = ?", (_norm(path),)
+            ).fetchone()
+        return bool(row and row["uploaded_at"])
+
+    def mark_uploaded(self, paths):
+        now = time.time()
+        with self._lock, self._db() as db:
+            db.executemany(
+                "UPDATE episodes SET uploaded_at = ? WHERE path = ? AND uploaded_at IS NULL",
+                [(now, _norm(p)) for p in paths],
+            )
+
+    def pending_uploads(self, feed=None):
+        sql = "SELECT * FROM episodes WHERE uploaded_at IS NULL AND path IS NOT NULL"
+        params = ()
+        if feed:
+            sql += " AND feed = ?"
+            params = (feed,)
+        with self._lock:
+            return self._db().execute(sql + " ORDER BY feed, path", params).fetchall()
+
+    def feed_stats(self):
+        with self._lock:
+            return self._db().execute(
+                """
+                SELECT feed,
+                       COUNT(*) AS downloaded,
+                       COUNT(uploaded_at) AS uploaded,
+                       COUNT(*) - COUNT(uploaded_at) AS pending,
+                       COALESCE(SUM(size), 0) AS bytes
+                FROM episodes GROUP BY feed ORDER BY feed
+                """
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def main(argv=None):
+    manifest = Manifest()
+
+    ap = argparse.ArgumentParser(description="查询本地下载清单")
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="每个栏目的下载/上传统计")
+    pending = sub.add_parser("pending", help="列出待上传文件")
+    pending.add_argument("--feed", help="只看某个栏目")
+    sub.add_parser("dupes", help="列出内容相同的节目")
+    args = ap.parse_args(argv)
+
+    if args.command == "stats":
+        rows = manifest.feed_stats()
+        if not rows:
+            print("(清单为空)")
+            return
+        print(f"{'栏目':<40} {'已下载':>6} {'已上传':>6} {'待上传':>6} {'大小(MB)':>10}")
+        for r in rows:
+            print(
+                f"{r['feed']:<40} {r['downloaded']:>6} {r['uploaded']:>6} "
+                f"{r['pending']:>6} {r['bytes'] / 1024 / 1024:>10.1f}"
+            )
+    elif args.command == "dupes":
+        rows = manifest.duplicate_groups()
+        last = None
+        for r in rows:
+            if r["sha256"] != last:
+                print(f"\nsha256 {r['sha256'][:16]}...")
+                last = r["sha256"]
+            state = "已上传" if r["uploaded_at"] else ("重复未保留" if not r["path"] else "本地")
+            print(f"  [{r['feed']}] {r['title']}  ({state})")
+        print(f"\n共 {len({r['sha256'] for r in rows})} 组重复内容")
+    else:
+        rows = manifest.pending_uploads(args.feed)
+        for r in rows:
+            print(f"[{r['feed']}] {r['path']}")
+        print(f"共 {len(rows)} 个待上传文件")
+
+
+if __name__ == "__main__":
+    main()
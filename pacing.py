@@ -0,0 +1,233 @@
+"""
+自适应节奏控制 (Pacer)
+=====================
+取代上传流程里固定的 wait_for_timeout / slow_mo / 每两次上传强制休息 5 分钟：
+
+- 等待的是真实条件 (页面网络空闲、元素出现、操作触发的请求返回)，条件满足立刻继续。
+  页内点击 (切换栏目、保存) 不是导航，wait_for_load_state("networkidle") 会立刻返回，
+  这类操作用 settle_after()：等操作触发的响应回来，再等页面上的 XHR/fetch 全部结束
+- 监听页面的 response 事件统计 429/5xx，requestfinished 事件统计服务器响应耗时
+  (Playwright 在请求结束时才填 timing，response 事件里还是 -1)
+- 只有在观察到慢响应或出错时才退避，退避时间指数增长并有上限；
+  恢复正常后退避逐步减半直到归零
+- 所有等待都计入 stats，最后在上传汇总里报告“等待耗时”
+"""
+
+import re
+import time
+
+DEFAULT_PACING = {
+    # Playwright 每个操作之间的固定延迟 (毫秒)，0 = 不额外拖慢
+    "slow_mo": 0,
+    # 等待页面网络空闲的最长时间 (毫秒)
+    "settle_timeout_ms": 15000,
+    # 单个请求 / 页面稳定耗时超过这个值 (毫秒) 就认为服务器变慢
+    "slow_response_ms": 3000,
+    # 退避起始值和上限 (秒)
+    "backoff_base_s": 5,
+    "backoff_max_s": 300,
+    # 等待“上传成功”的最长时间 (毫秒)
+    "upload_timeout_ms": 1800000,
+    # 页内操作之后，XHR/fetch 连续空闲这么久 (毫秒) 才算刷新完成
+    "quiet_ms": 500,
+    # 切换栏目 / 保存时要等的响应 URL (正则)；留空 = 任意 XHR/fetch 请求 (保存时要求 POST)
+    "channel_list_url": "",
+    "save_url": "",
+}
+
+_PAGE_REQUEST_TYPES = ("xhr", "fetch")
+
+
+class Pacer:
+    def __init__(self, options=None):
+        self.options = dict(DEFAULT_PACING)
+        self.options.update(options or {})
+        self.backoff = 0.0
+        self.wait_seconds = 0.0
+        self.backoff_seconds = 0.0
+        self.slow_events = 0
+        self.error_events = 0
+        self.responses = 0
+        self.timed_responses = 0
+        self.response_ms_total = 0.0
+        # 页面上还没结束的 XHR/fetch 请求数
+        self.in_flight = 0
+
+    # ---------- 观测 ----------
+
+    def attach(self, page):
+        """监听页面上所有请求的状态码和响应耗时"""
+        page.on("request", self._on_request)
+        page.on("response", self._on_response)
+        page.on("requestfinished", self._on_request_finished)
+        page.on("requestfailed", self._on_request_done)
+
+    def _on_request(self, request):
+        if request.resource_type in _PAGE_REQUEST_TYPES:
+            self.in_flight += 1
+
+    def _on_request_done(self, request):
+        if request.resource_type in _PAGE_REQUEST_TYPES:
+            self.in_flight = max(self.in_flight - 1, 0)
+
+    def _on_response(self, response):
+        self.record_response(response.status)
+
+    def _on_request_finished(self, request):
+        self._on_request_done(request)
+        try:
+            elapsed_ms = request.timing.get("responseEnd", -1)
+        except Exception:
+            elapsed_ms = -1
+        self.record_timing(elapsed_ms)
+
+    def record_response(self, status, elapsed_ms=-1):
+        """记录一次 HTTP 响应：429/5xx 算出错；带耗时时一并记录 (见 record_timing)"""
+        self.responses += 1
+        if status == 429 or status >= 500:
+            self.record_error()
+        elif elapsed_ms >= 0:
+            self.record_timing(elapsed_ms)
+
+    def record_timing(self, elapsed_ms):
+        """记录一次请求耗时，超过 slow_response_ms 算变慢；没有耗时 (-1) 的不计入平均"""
+        if elapsed_ms < 0:
+            return
+        self.timed_responses += 1
+        self.response_ms_total += elapsed_ms
+        if elapsed_ms > self.options["slow_response_ms"]:
+            self.record_slow()
+
+    def record_slow(self):
+        self.slow_events += 1
+        self._increase()
+
+    def record_error(self):
+        self.error_events += 1
+        self._increase()
+
+    def record_ok(self):
+        """一次操作顺利完成，退避减半，足够小就归零"""
+        self.backoff /= 2
+        if self.backoff < 1:
+            self.backoff = 0.0
+
+    def _increase(self):
+        base = self.options["backoff_base_s"]
+        self.backoff = min(max(self.backoff * 2, base), self.options["backoff_max_s"])
+
+    # ---------- 等待 ----------
+
+    def settle(self, page):
+        """
+        导航 (goto / reload) 之后等页面网络空闲；超时或太慢都视为服务器变慢。
+        页内点击不会让文档重新进入加载状态，这里会立刻返回，要用 settle_after()
+        """
+        started = time.time()
+        try:
+            page.wait_for_load_state(
+                "networkidle", timeout=self.options["settle_timeout_ms"]
+            )
+            elapsed_ms = (time.time() - started) * 1000
+            if elapsed_ms > self.options["slow_response_ms"]:
+                self.record_slow()
+            else:
+                self.record_ok()
+        except Exception:
+            self.record_slow()
+        finally:
+            self.wait_seconds += time.time() - started
+
+    def settle_after(self, page, action, url_pattern="", method=None, timeout_ms=None):
+        """
+        执行 action (页内点击等)，等它触发的响应回来，再等页面上的 XHR/fetch 连续 quiet_ms 没有请求。
+        url_pattern 为空时匹配任意 XHR/fetch/文档请求，method 不为空时还要求请求方法一致。
+        返回是否等到了响应；没等到记一次变慢。action 自己抛出的异常原样抛出。
+        """
+        from playwright.sync_api import TimeoutError as PlaywrightTimeout
+
+        timeout_ms = timeout_ms or self.options["settle_timeout_ms"]
+        pattern = re.compile(url_pattern) if url_pattern else None
+
+        def matches(response):
+            request = response.request
+            if method is not None and request.method != method:
+                return False
+            if pattern is not None:
+                return bool(pattern.search(response.url))
+            return request.resource_type in _PAGE_REQUEST_TYPES + ("document",)
+
+        started = time.time()
+        fired = True
+        action_failed = False
+        try:
+            try:
+                with page.expect_response(matches, timeout=timeout_ms):
+                    try:
+                        action()
+                    except Exception:
+                        action_failed = True
+                        raise
+            except PlaywrightTimeout:
+                if action_failed:
+                    raise  # action 本身超时 (例如元素没出现)，不是没等到响应
+                fired = False
+            if fired:
+                self._wait_quiet(page, started + timeout_ms / 1000)
+            elapsed_ms = (time.time() - started) * 1000
+            if not fired or elapsed_ms > self.options["slow_response_ms"]:
+                self.record_slow()
+            else:
+                self.record_ok()
+            return fired
+        finally:
+            self.wait_seconds += time.time() - started
+
+    def _wait_quiet(self, page, deadline):
+        """等页面上没有进行中的 XHR/fetch，并且保持 quiet_ms；最多等到 deadline"""
+        quiet_s = self.options["quiet_ms"] / 1000
+        quiet_since = time.time()
+        while time.time() < deadline:
+            # wait_for_timeout 期间 Playwright 才会派发 request / requestfinished 事件
+            page.wait_for_timeout(50)
+            if self.in_flight > 0:
+                quiet_since = time.time()
+            elif time.time() - quiet_since >= quiet_s:
+                return
+
+    def wait_for(self, locator, timeout_ms=None):
+        """等某个元素出现，计入等待耗时；超时异常原样抛出"""
+        started = time.time()
+        try:
+            locator.wait_for(timeout=timeout_ms or self.options["settle_timeout_ms"])
+        finally:
+            self.wait_seconds += time.time() - started
+
+    def cooldown(self):
+        """只有在当前处于退避状态时才休息"""
+        if self.backoff <= 0:
+            return
+        print(f"☕ 服务器响应变慢，退避 {self.backoff:.0f}s ...")
+        time.sleep(self.backoff)
+        self.wait_seconds += self.backoff
+        self.backoff_seconds += self.backoff
+
+    # ---------- 汇总 ----------
+
+    def merge(self, other):
+        """合并另一个 Pacer 的统计 (多个浏览器上下文并行时用)"""
+        self.wait_seconds += other.wait_seconds
+        self.backoff_seconds += other.backoff_seconds
+        self.slow_events += other.slow_events
+        self.error_events += other.error_events
+        self.responses += other.responses
+        self.timed_responses += other.timed_responses
+        self.response_ms_total += other.response_ms_total
+
+    def summary(self):
+        avg_ms = self.response_ms_total / self.timed_responses if self.timed_responses else 0
+        return (
+            f"等待耗时 {self.wait_seconds:.1f}s (其中退避 {self.backoff_seconds:.1f}s)，"
+            f"响应 {self.responses} 个 / 平均 {avg_ms:.0f}ms，"
+            f"慢响应 {self.slow_events} 次，错误 {self.error_events} 次"
+        )
@@ -0,0 +1,124 @@
+"""
+配置 (config.yaml)
+==================
+轻量的配置对象：导入本模块不会读文件，也不会拉起 pandas / feedparser / requests 等重依赖；
+第一次访问某个配置项时才读取 config.yaml，之后可以 reload() 重新加载。
+
+    from settings import settings
+    settings.DOWNLOAD_FOLDER
+    settings.reload()                         # 重新读取 config.yaml
+    settings.override(DOWNLOAD_FOLDER="tmp")  # 临时覆盖 (基准测试 / 调试用)
+"""
+
+import os
+import threading
+
+CONFIG_FILE = "config.yaml"
+
+# Python 属性名 -> (yaml key, 默认值)
+# 如果 yaml 里没写或者读不到，就用默认值
+_FIELDS = {
+    "RSS_FEEDS": ("rss_feeds", {}),
+    "YEAR_FROM": ("year_from", 2025),
+    "YEAR_END": ("year_end", 9999),
+    "LATEST_NUM": ("latest_num", 2),
+    "DOWNLOAD_FOLDER": ("download_folder", "rss_download"),
+    "HEADLESS": ("headless", False),
+    "ENABLE_FETCH": ("enable_fetch", True),
+    "ENABLE_UPLOAD": ("enable_upload", True),
+    "FETCH_WORKERS": ("fetch_workers", 4),
+    "FEED_PARSER": ("feed_parser", "feedparser"),
+    "FEED_CACHE_FILE": ("feed_cache_file", os.path.join(".cache", "feed_cache.json")),
+    "HOST_CONCURRENCY": ("host_concurrency", {}),
+    "DOWNLOAD_RETRIES": ("download_retries", 3),
+    "DOWNLOAD_SEGMENTS": ("download_segments", 4),
+    "SEGMENT_MIN_MB": ("segment_min_mb", 20),
+    "INCREMENTAL": ("incremental", False),
+    "MANIFEST_FILE": ("manifest_file", os.path.join(".cache", "manifest.db")),
+    "CONTENT_DEDUPE": ("content_dedupe", "link"),
+    "SKIP_UPLOADED_CONTENT": ("skip_uploaded_content", True),
+    "TRANSCODE": ("transcode", {}),
+    "PIPELINE": ("pipeline", False),
+    "PIPELINE_QUEUE_SIZE": ("pipeline_queue_size", 2),
+    "PACING": ("pacing", {}),
+    "ZIP_MAX_MB": ("zip_max_mb", 500),
+    "ZIP_MAX_FILES": ("zip_max_files", 30),
+    "CHUNK_RETRIES": ("chunk_retries", 2),
+    "REMOTE_CATALOG_FILE": ("remote_catalog_file", os.path.join(".cache", "remote_catalog.json")),
+    "REMOTE_CATALOG_TTL_HOURS": ("remote_catalog_ttl_hours", 24),
+    "UPLOAD_WORKERS": ("upload_workers", 1),
+    "UPLOAD_BACKEND": ("upload_backend", "playwright"),
+    "HTTP_UPLOAD": ("http_upload", {}),
+    "BROWSER_SERVICE": ("browser_service", {}),
+    "DAEMON": ("daemon", {}),
+    "LOG_FLUSH_INTERVAL": ("log_flush_interval", 0.5),
+    "LOG_MAX_MB": ("log_max_mb", 20),
+}
+
+
+def load_config(path=CONFIG_FILE):
+    """
+    读取 YAML 配置文件
+    返回一个 Python 字典，例如: {'rss_feeds': {...}, 'year_from': 2025}
+    """
+    if not os.path.exists(path):
+        print(f"⚠️  警告: 找不到配置文件 {path}，将使用代码内的默认值。")
+        return {}
+
+    try:
+        import yaml  # 必须安装: pip install PyYAML
+
+        with open(path, "r", encoding="utf-8") as f:
+            # yaml.safe_load 是将 yaml 文本转为 python 字典的核心函数
+            return yaml.safe_load(f) or {}
+    except Exception as e:
+        print(f"❌ 读取配置文件失败: {e}")
+        return {}
+
+
+class Settings:
+    """按需加载、可重新加载的配置对象，属性名就是以前 fetch_rss 里的大写全局变量名"""
+
+    def __init__(self, path=CONFIG_FILE):
+        self._path = path
+        self._raw = None
+        self._overrides = {}
+        self._lock = threading.Lock()
+
+    @property
+    def raw(self):
+        """config.yaml 的原始字典"""
+        if self._raw is None:
+            with self._lock:
+                if self._raw is None:
+                    self._raw = load_config(self._path)
+        return self._raw
+
+    def reload(self):
+        """丢弃已读取的内容，下次访问时重新读 config.yaml (覆盖值保留)"""
+        with self._lock:
+            self._raw = None
+
+    def override(self, **values):
+        """临时覆盖配置项，例如 settings.override(DOWNLOAD_FOLDER="/tmp/x")"""
+        for name in values:
+            if name not in _FIELDS:
+                raise AttributeError(f"未知配置项: {name}")
+        self._overrides.update(values)
+
+    def clear_overrides(self):
+        self._overrides.clear()
+
+    def __getattr__(self, name):
+        if name not in _FIELDS:
+            raise AttributeError(name)
+        if name in self._overrides:
+            return self._overrides[name]
+        key, default = _FIELDS[name]
+        return self.raw.get(key, default)
+
+    def __dir__(self):
+        return list(_FIELDS) + ["raw", "reload", "override", "clear_overrides"]
+
+
+settings = Settings()
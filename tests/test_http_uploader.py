@@ -0,0 +1,100 @@
+"""
+HttpUploader 对 fake_eudic_server.FakeEudic 的端到端测试 (本地起服务，不访问真实后台)
+
+    python -m pytest tests
+    python -m unittest discover -s tests
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import zipfile
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+from fake_eudic_server import FakeEudic, make_handler  # noqa: E402
+from pacing import Pacer  # noqa: E402
+from uploaders import HttpUploader, create_uploader  # noqa: E402
+
+CHANNELS = ["Six Minute English", "CNN 10"]
+
+
+class HttpUploaderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.state = FakeEudic(CHANNELS, cookie_names=["EudicWebSession"])
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(self.state))
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.auth_file = self._auth_file("EudicWebSession")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def _auth_file(self, cookie_name):
+        path = self._path(f"auth-{cookie_name}.json")
+        state = {"cookies": [{"name": cookie_name, "value": "x", "domain": "127.0.0.1", "path": "/"}]}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        return path
+
+    def _audio(self, name, size=200 * 1024):
+        path = self._path(name)
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        return path
+
+    def _uploader(self, auth_file=None):
+        return create_uploader(
+            "http", auth_file or self.auth_file, Pacer(), http_options={"base_url": self.base_url}
+        )
+
+    def test_upload_single_and_zip(self):
+        single = self._audio("Episode-One.mp3")
+        zip_path = self._path("batch.zip")
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            zf.write(self._audio("Episode-Two.mp3"), "Episode-Two.mp3")
+            zf.write(self._audio("Episode-Three.mp3"), "Episode-Three.mp3")
+
+        with self._uploader() as uploader:
+            self.assertIsInstance(uploader, HttpUploader)
+            # 和网页点击一样按“包含”匹配栏目名
+            self.assertTrue(uploader.select_channel("CNN"))
+            self.assertFalse(uploader.select_channel("No Such Channel"))
+            self.assertTrue(uploader.select_channel("Six Minute English"))
+            self.assertEqual(uploader.remote_titles(), [])
+
+            uploader.upload_single(single)
+            uploader.upload_zip(zip_path)
+            self.assertEqual(
+                uploader.remote_titles(), ["Episode-One", "Episode-Two", "Episode-Three"]
+            )
+        self.assertEqual(self.state.items[2], [])
+        self.assertGreaterEqual(uploader.pacer.responses, 5)
+
+    def test_rejects_missing_cookie(self):
+        uploader = self._uploader(self._auth_file("SomeOtherCookie"))
+        with self.assertRaises(requests.HTTPError):
+            uploader.open()
+        uploader.close()
+
+    def test_requires_explicit_base_url(self):
+        uploader = create_uploader("http", self.auth_file, Pacer())
+        with self.assertRaises(RuntimeError):
+            uploader.open()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+get_article_from_bbc 两套 HTML -> Markdown 引擎对 golden 文件的逐字节比对
+
+golden/bbc_markdown/<页面名>.html 对应 <页面名>.md；缺少 .md 直接失败，
+确认输出无误后用 `python bench_markdown.py --update-golden` 生成。
+
+    python -m pytest tests
+    python -m unittest discover -s tests
+"""
+
+import glob
+import io
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import get_article_from_bbc as gab  # noqa: E402
+
+GOLDEN_DIR = os.path.join(ROOT, "golden", "bbc_markdown")
+
+
+def _fast(html):
+    buf = io.StringIO()
+    gab.render_article_fast(html, out=buf)
+    return buf.getvalue()
+
+
+class MarkdownGoldenTest(unittest.TestCase):
+    def setUp(self):
+        self.pages = sorted(glob.glob(os.path.join(GOLDEN_DIR, "*.html")))
+        self.assertTrue(self.pages, f"{GOLDEN_DIR} 里没有页面")
+
+    def _check(self, render):
+        for page in self.pages:
+            golden_path = os.path.splitext(page)[0] + ".md"
+            with self.subTest(page=os.path.basename(page)):
+                self.assertTrue(os.path.exists(golden_path), f"缺少 golden: {golden_path}")
+                with open(page, "rb") as f:
+                    html = f.read()
+                with open(golden_path, "r", encoding="utf-8", newline="") as f:
+                    self.assertEqual(render(html), f.read())
+
+    def test_classic_matches_golden(self):
+        self._check(lambda html: gab.render_article(html)[0])
+
+    def test_fast_matches_golden(self):
+        self._check(_fast)
+
+    def test_engines_agree_on_filename(self):
+        for page in self.pages:
+            with open(page, "rb") as f:
+                html = f.read()
+            self.assertEqual(gab.render_article(html)[1], gab.render_article_fast(html)[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
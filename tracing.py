@@ -0,0 +1,113 @@
+"""
+分阶段计时 (span)
+=================
+给下载 / 打包 / 上传的每一步计时，写成 JSON Lines 追踪文件 (和文本日志放在一起)，
+并在运行结束时按栏目汇总“时间都花在哪了”。
+
+    with tracing.context(channel="CNN 10"):
+        with tracing.span("upload_wait", file="a.mp3") as sp:
+            ...
+            sp["bytes"] = 123
+
+每条记录: {"ts", "name", "duration_s", "outcome", "thread", ...附加字段}
+outcome 默认 ok；with 块里抛异常时为 error，也可以手动设置 (例如 cached / skipped)。
+"""
+
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_local = threading.local()
+_trace_file = None
+# (栏目, span 名) -> [次数, 总耗时, 总字节数]
+_totals = defaultdict(lambda: [0, 0.0, 0])
+
+
+def start_trace(path):
+    """开始把 span 写入 path (JSON Lines)"""
+    global _trace_file
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+        _trace_file = open(path, "a", encoding="utf-8")
+        _totals.clear()
+
+
+def stop_trace():
+    global _trace_file
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
+
+
+@contextmanager
+def context(**attrs):
+    """给当前线程里之后产生的 span 附加公共字段 (例如 channel / feed)"""
+    previous = getattr(_local, "attrs", {})
+    _local.attrs = {**previous, **attrs}
+    try:
+        yield
+    finally:
+        _local.attrs = previous
+
+
+@contextmanager
+def span(name, **attrs):
+    record = {**getattr(_local, "attrs", {}), **attrs}
+    started = time.time()
+    try:
+        yield record
+    except BaseException:
+        record.setdefault("outcome", "error")
+        raise
+    finally:
+        duration = time.time() - started
+        record.setdefault("outcome", "ok")
+        _emit(name, started, duration, record)
+
+
+def _emit(name, started, duration, record):
+    line = {
+        "ts": round(started, 3),
+        "name": name,
+        "duration_s": round(duration, 4),
+        "thread": threading.current_thread().name,
+        **record,
+    }
+    group = record.get("channel") or record.get("feed") or "-"
+    with _lock:
+        total = _totals[(group, name)]
+        total[0] += 1
+        total[1] += duration
+        total[2] += int(record.get("bytes") or 0)
+        if _trace_file is not None:
+            _trace_file.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+            _trace_file.flush()
+
+
+def print_breakdown():
+    """按栏目打印各阶段的次数 / 总耗时 / 字节数"""
+    with _lock:
+        totals = {k: list(v) for k, v in _totals.items()}
+    if not totals:
+        return
+
+    by_group = defaultdict(dict)
+    for (group, name), value in totals.items():
+        by_group[group][name] = value
+
+    print("\n" + "=" * 50)
+    print("⏱️ 耗时分布 (按栏目):")
+    for group in sorted(by_group, key=lambda g: -sum(v[1] for v in by_group[g].values())):
+        stages = by_group[group]
+        print(f"  [{group}] 合计 {sum(v[1] for v in stages.values()):.1f}s")
+        for name, (count, seconds, nbytes) in sorted(
+            stages.items(), key=lambda kv: -kv[1][1]
+        ):
+            size = f", {nbytes / 1024 / 1024:.1f} MB" if nbytes else ""
+            print(f"     - {name:<16} {seconds:>8.1f}s  ({count} 次{size})")
+    print("=" * 50)
@@ -0,0 +1,178 @@
+"""
+音频重新编码 (transcode)
+========================
+播客 MP3 多是 128–192 kbps 立体声，听力练习用不着。上传是最慢、最容易失败的一步，
+在下载和上传之间加一道可选的转码：用本机的 ffmpeg 转成单声道、较低码率的 MP3，
+上传字节数减半，上传阶段的耗时也大致减半。
+
+- 文件名保持不变，标题比对和清单去重都不受影响
+- 按源文件 sha256 缓存转码结果 (.cache/transcoded/<sha256>.mp3)，同一份音频只转一次
+- 已经转过的文件按 (大小, 修改时间) 记住，下次直接跳过，不用重新读文件算哈希
+- 用进程池并行，大小默认等于 CPU 核数；找不到 ffmpeg 时整个阶段跳过
+- 转码后反而更大的文件保留原样
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import tracing
+from json_store import JsonStore
+from settings import settings
+
+DEFAULT_TRANSCODE = {
+    # 是否在下载完成后转码
+    "enabled": False,
+    # 目标码率和声道数
+    "bitrate": "64k",
+    "channels": 1,
+    # 进程数，0 = CPU 核数
+    "workers": 0,
+    # ffmpeg 路径，留空则在 PATH 里找
+    "ffmpeg": "",
+    "cache_dir": os.path.join(".cache", "transcoded"),
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_index_lock = threading.Lock()
+
+
+def transcode_options():
+    options = dict(DEFAULT_TRANSCODE)
+    options.update(settings.TRANSCODE or {})
+    return options
+
+
+def find_ffmpeg(options):
+    return options["ffmpeg"] or shutil.which("ffmpeg")
+
+
+def _get_pool(options):
+    """所有 feed 共用一个进程池，避免并发下载多个 feed 时进程数翻倍"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(options["workers"] or 0) or os.cpu_count() or 1
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def _sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _encode(ffmpeg, src, dst, bitrate, channels):
+    """在子进程里调用 ffmpeg，成功返回 None，失败返回错误信息"""
+    tmp = dst + ".part"
+    cmd = [
+        ffmpeg, "-nostdin", "-loglevel", "error", "-y",
+        "-i", src,
+        "-vn", "-map_metadata", "0",
+        "-codec:a", "libmp3lame", "-b:a", str(bitrate), "-ac", str(channels),
+        "-f", "mp3", tmp,
+    ]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "ffmpeg 失败"
+    os.replace(tmp, dst)
+    return None
+
+
+class _Index:
+    """cache_dir/index.json: 已转码文件的 (大小, 修改时间)"""
+
+    def __init__(self, cache_dir):
+        self._store = JsonStore(os.path.join(cache_dir, "index.json"))
+        self.done = self._store.load().setdefault("done", {})
+
+    def is_done(self, path):
+        return self.done.get(os.path.abspath(path)) == _stamp(path)
+
+    def mark_done(self, path):
+        self.done[os.path.abspath(path)] = _stamp(path)
+
+    def save(self):
+        self._store.save()
+
+
+def transcode_folder(folder):
+    """
+    把 folder 里还没转过的 MP3 转成目标码率并原地替换，返回 (转码数, 节省字节数)
+    """
+    options = transcode_options()
+    ffmpeg = find_ffmpeg(options)
+    if not ffmpeg:
+        print("⚠️  未找到 ffmpeg，跳过转码")
+        return 0, 0
+    cache_dir = options["cache_dir"]
+    os.makedirs(cache_dir, exist_ok=True)
+
+    with _index_lock:
+        index = _Index(cache_dir)
+        todo = [
+            os.path.join(folder, f)
+            for f in sorted(os.listdir(folder))
+            if f.endswith(".mp3") and not index.is_done(os.path.join(folder, f))
+        ]
+    if not todo:
+        return 0, 0
+
+    with tracing.span("transcode", files=len(todo)) as sp:
+        # 按源哈希找缓存，没有的交给进程池
+        jobs = {}
+        sources = {}
+        for path in todo:
+            digest = _sha256(path)
+            cached = os.path.join(cache_dir, f"{digest}.mp3")
+            sources[path] = cached
+            if not os.path.exists(cached) and cached not in jobs:
+                jobs[cached] = _get_pool(options).submit(
+                    _encode, ffmpeg, path, cached, options["bitrate"], options["channels"]
+                )
+        if jobs:
+            print(f"  🎚️ 转码 {len(jobs)} 个文件 ({options['bitrate']}, {options['channels']} 声道)...")
+
+        failed = set()
+        for cached, fut in jobs.items():
+            error = fut.result()
+            if error:
+                print(f"  ⚠️ 转码失败 {os.path.basename(cached)}: {error}")
+                failed.add(cached)
+
+        count, saved = 0, 0
+        with _index_lock:
+            index = _Index(cache_dir)
+            for path, cached in sources.items():
+                if cached in failed or not os.path.exists(cached):
+                    continue
+                before = os.path.getsize(path)
+                after = os.path.getsize(cached)
+                if after < before:
+                    # 先复制到同目录的临时文件再原子替换，文件名不变
+                    tmp = path + ".transcode"
+                    shutil.copyfile(cached, tmp)
+                    os.replace(tmp, path)
+                    count += 1
+                    saved += before - after
+                index.mark_done(path)
+            index.save()
+        sp["bytes_saved"] = saved
+
+    if count:
+        print(f"  ✅ 转码完成 {count} 个，节省 {saved / 1024 / 1024:.1f} MB")
+    return count, saved
@@ -0,0 +1,550 @@
+"""
+上传后端 (Uploader)
+==================
+run_uploader 只负责“比对 -> 决定单文件/ZIP -> 记录结果”，真正和每日英语听力后台打交道的
+部分放在这里，通过统一的接口切换：
+
+- PlaywrightUploader: 驱动 Chromium 模拟点击 (默认，也是兜底方案)；
+  开启 browser_service 时通过 CDP 连接常驻浏览器，复用已经打开的后台页面
+- HttpUploader: 不开浏览器，复用 auth.json 里的 cookie 直接 POST 文件
+  (流式 multipart 请求体 + 连接池)。实验性：真实后台的接口还没有抓包确认，
+  默认的接口路径只是和 fake_eudic_server.py 约定的占位，base_url 默认为空，必须显式配置
+
+后端由 config.yaml 的 upload_backend 选择；HTTP 后端的接口地址在 http_upload 里配置，
+用 fake_eudic_server.py 在本地验证 (tests/test_http_uploader.py)。
+"""
+
+import json
+import mimetypes
+import os
+import re
+import threading
+import time
+import uuid
+from urllib.parse import urljoin
+
+import tracing
+
+EUDIC_INDEX_URL = "http://my.eudic.net/Ting/index"
+
+# 常驻浏览器里已经打开的后台页面只给一个工作者复用，其余工作者各开新页面
+_warm_page_lock = threading.Lock()
+_warm_page_taken = False
+
+
+def _release_warm_page():
+    global _warm_page_taken
+    with _warm_page_lock:
+        _warm_page_taken = False
+
+
+class UploadFailed(Exception):
+    """后台明确提示“上传失败”，需要停止整个上传任务"""
+
+
+class Uploader:
+    """
+    上传后端接口。每个上传工作者持有一个实例，open() 之后按栏目依次调用：
+    select_channel -> remote_titles -> upload_single / upload_zip -> refresh
+    """
+
+    name = "base"
+
+    def __init__(self, auth_file, pacer):
+        self.auth_file = auth_file
+        self.pacer = pacer
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def select_channel(self, channel_name):
+        """切换到栏目，找不到时返回 False"""
+        raise NotImplementedError
+
+    def remote_titles(self):
+        """当前栏目下已有的节目标题 (原样返回，规范化交给 RemoteTitleIndex)"""
+        raise NotImplementedError
+
+    def upload_single(self, path):
+        """上传单个音频并启用 AI 字幕"""
+        raise NotImplementedError
+
+    def upload_zip(self, path):
+        """上传 ZIP 批量包"""
+        raise NotImplementedError
+
+    def refresh(self):
+        """一个栏目处理完之后恢复到干净状态"""
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ================= Playwright 后端 =================
+
+
+class PlaywrightUploader(Uploader):
+    name = "playwright"
+
+    def __init__(self, auth_file, pacer, headless=True, browser_service=None):
+        super().__init__(auth_file, pacer)
+        self.headless = headless
+        # browser_service: browser_service.py 的配置，enabled 时通过 CDP 连接常驻浏览器
+        self.browser_service = browser_service
+        self._pw = None
+        self.browser = None
+        self.context = None
+        self.page = None
+        self._owns_page = True
+        self._cookies_before = None
+
+    @property
+    def uses_service(self):
+        return bool(self.browser_service and self.browser_service.get("enabled"))
+
+    def open(self):
+        from playwright.sync_api import sync_playwright
+
+        self._pw = sync_playwright().start()
+        if self.uses_service:
+            self._open_over_cdp()
+            return
+
+        # headless 由 config.yaml 控制；slow_mo 默认 0，节奏交给 Pacer
+        self.browser = self._pw.chromium.launch(
+            headless=self.headless, slow_mo=self.pacer.options["slow_mo"]
+        )
+        self.context = self.browser.new_context(storage_state=self.auth_file)
+        self.page = self.context.new_page()
+        self.pacer.attach(self.page)
+
+        print("🌍 打开后台管理页面...")
+        self.page.goto(EUDIC_INDEX_URL)
+        self.pacer.settle(self.page)
+
+    def _open_over_cdp(self):
+        import browser_service
+
+        executable = self._pw.chromium.executable_path
+        with tracing.span("browser_connect") as sp:
+            cdp_url = browser_service.ensure_running(
+                self.browser_service, self.headless, executable=executable
+            )
+            try:
+                # 端口能响应但浏览器本身卡死时，CDP 握手会超时
+                self.browser = self._pw.chromium.connect_over_cdp(cdp_url, timeout=10000)
+                self.context = self.browser.contexts[0]
+            except Exception as e:
+                print(f"⚠️  连接常驻浏览器失败: {e}")
+                sp["outcome"] = "restarted"
+                cdp_url = browser_service.restart(
+                    self.browser_service, self.headless, executable=executable
+                )
+                self.browser = self._pw.chromium.connect_over_cdp(cdp_url, timeout=10000)
+                self.context = self.browser.contexts[0]
+
+        self.page = self._take_warm_page()
+        self.pacer.attach(self.page)
+        if self.page.url.startswith(EUDIC_INDEX_URL):
+            print("🔥 复用常驻浏览器里已打开的后台页面")
+            self.refresh()
+        else:
+            print("🌍 常驻浏览器: 打开后台管理页面...")
+            self._load_auth_cookies()
+            self.page.goto(EUDIC_INDEX_URL)
+            self.pacer.settle(self.page)
+        self._cookies_before = self._cookie_snapshot()
+
+    def _take_warm_page(self):
+        """整个进程同一时间只有一个工作者拿到热页面；close() 时归还"""
+        global _warm_page_taken
+        with _warm_page_lock:
+            if not _warm_page_taken:
+                for page in self.context.pages:
+                    if page.url.startswith(EUDIC_INDEX_URL):
+                        _warm_page_taken = True
+                        self._owns_page = False
+                        return page
+        return self.context.new_page()
+
+    def _load_auth_cookies(self):
+        """常驻浏览器的用户目录里还没有登录态时，用 auth.json 的 cookie 补上"""
+        if self.context.cookies(EUDIC_INDEX_URL) or not os.path.exists(self.auth_file):
+            return
+        with open(self.auth_file, "r", encoding="utf-8") as f:
+            cookies = json.load(f).get("cookies", [])
+        if cookies:
+            self.context.add_cookies(cookies)
+
+    def _cookie_snapshot(self):
+        return sorted(
+            (c["domain"], c["name"], c["value"]) for c in self.context.cookies()
+        )
+
+    def close(self):
+        if self.uses_service:
+            self._close_over_cdp()
+            return
+        try:
+            if self.context is not None:
+                self.context.close()
+            if self.browser is not None:
+                self.browser.close()
+        finally:
+            if self._pw is not None:
+                self._pw.stop()
+                self._pw = None
+
+    def _close_over_cdp(self):
+        """断开 CDP 连接但不关闭浏览器；复用的后台页面留着给下次运行"""
+        try:
+            if self.context is not None:
+                if self._cookie_snapshot() != self._cookies_before:
+                    # 登录态刷新过，写回 auth.json，冷启动模式和 HTTP 后端也能用上
+                    self.context.storage_state(path=self.auth_file)
+                    print(f"🍪 cookie 已更新，写回 {self.auth_file}")
+                if self._owns_page and self.page is not None:
+                    self.page.close()
+        finally:
+            if not self._owns_page:
+                # 把热页面还回去，守护模式下一次 run_uploader 还能复用
+                _release_warm_page()
+                self._owns_page = True
+            if self._pw is not None:
+                self._pw.stop()
+                self._pw = None
+
+    def select_channel(self, channel_name):
+        # 在网页左侧点击栏目，等右侧刷新完成：点击不是导航，要等栏目列表的请求真正返回、
+        # 页面上的请求都结束，否则 remote_titles() 读到的是上一个栏目的列表
+        link = self.page.get_by_text(channel_name, exact=False).first
+        try:
+            link.wait_for(timeout=self.pacer.options["settle_timeout_ms"])
+        except Exception:
+            return False
+        if not self.pacer.settle_after(
+            self.page, link.click, url_pattern=self.pacer.options["channel_list_url"]
+        ):
+            print(f"      ⚠️  没等到 [{channel_name}] 的列表刷新，跳过，避免用旧列表比对")
+            return False
+        return True
+
+    def remote_titles(self):
+        # 把页面可见文本按行 / 表格单元格拆开，每一段都当作一个候选标题
+        text = self.page.locator("body").inner_text()
+        return re.split(r"[\t\n]+", text)
+
+    def _submit_file(self, upload_path):
+        """A-D 步：点击 [上传听力] -> 填入文件 -> 等待“上传成功” -> 下一步"""
+        page, pacer = self.page, self.pacer
+        fname_record = os.path.basename(upload_path)
+
+        with tracing.span("file_set", file=fname_record):
+            # A. 点击上传按钮 (Playwright 的 click 会自动等待按钮可点击)
+            print("      1️⃣  点击 [上传听力]...")
+            page.get_by_role("button", name=re.compile("上传听力")).click()
+
+            # B. 填入文件
+            print(f"      2️⃣  填入文件: {fname_record}")
+            page.locator("input[type='file']").set_input_files(upload_path)
+
+        # C. 等待上传进度条走完
+        print("      ⏳  等待上传成功提示...")
+        with tracing.span(
+            "upload_wait", file=fname_record, bytes=os.path.getsize(upload_path)
+        ) as sp:
+            try:
+                pacer.wait_for(
+                    page.get_by_text("上传成功"),
+                    timeout_ms=pacer.options["upload_timeout_ms"],
+                )
+            except Exception as e:
+                # 如果没等到成功，检查是不是失败了
+                if (
+                    page.get_by_text("上传失败").is_visible()
+                    or page.get_by_text("失败").is_visible()
+                ):
+                    pacer.record_error()
+                    sp["outcome"] = "failed"
+                    raise UploadFailed(fname_record) from e
+                raise  # 如果不是失败（只是超时），抛出原异常
+
+        print("      ✅  文件传输完成")
+
+        # D. 点击下一步 (这是去第二页的关键)
+        print("      3️⃣  点击 [下一步]...")
+        page.get_by_text("下一步", exact=True).click()
+
+    def upload_single(self, path):
+        self._submit_file(path)
+        with tracing.span("save", file=os.path.basename(path)):
+            self._save_single()
+
+    def _save_single(self):
+        page = self.page
+
+        # E. 第二页
+        print("      点击 生成AI字幕")
+        page.get_by_role("radio", name="生成AI字幕").check()
+
+        print("      点击 我已阅读并同意")
+        page.get_by_role("checkbox", name="我已阅读并同意").check()
+
+        print("      准备点击 [保存] 按钮，并自动确认弹窗...")
+        page.once("dialog", lambda dialog: dialog.accept())
+        self._save_and_wait(lambda: page.get_by_role("button", name="保存").click())
+
+    def upload_zip(self, path):
+        self._submit_file(path)
+        with tracing.span("save", file=os.path.basename(path)):
+            self._save_zip()
+
+    def _save_zip(self):
+        page = self.page
+
+        # E. 第二页
+        print("      点击 我已阅读并同意")
+        page.get_by_role("checkbox", name="我已阅读并同意").check()
+
+        def save_and_confirm():
+            print("      准备点击 [保存] 按钮...")
+            page.get_by_role("button", name="保存").click()
+            print("      准备点击 [确定] 按钮...")
+            page.get_by_text("确定").click()
+
+        self._save_and_wait(save_and_confirm)
+
+    def _save_and_wait(self, action):
+        """
+        执行保存操作，并等保存请求 (POST) 返回、页面请求结束后才返回；
+        之后 refresh() 的 reload 不会打断保存。没等到就按上传失败处理，不能假装保存成功
+        """
+        if not self.pacer.settle_after(
+            self.page, action, url_pattern=self.pacer.options["save_url"], method="POST"
+        ):
+            raise UploadFailed("没等到保存请求返回")
+
+    def refresh(self):
+        print("      🔄  刷新页面，准备下一轮...")
+        self.page.reload()
+        self.pacer.settle(self.page)
+
+
+# ================= HTTP 后端 =================
+
+# 占位接口：和 fake_eudic_server.py 一致，不是真实后台的接口 (尚未确认)。
+# base_url 默认留空，避免误把这些猜测的路径打到生产环境上
+DEFAULT_HTTP_UPLOAD = {
+    "base_url": "",
+    # 栏目列表: 返回 JSON [{"id": ..., "name": ...}, ...]
+    "channels_path": "/Ting/api/channels",
+    # 栏目下的节目: 返回 JSON [{"title": ...}, ...]
+    "items_path": "/Ting/api/channels/{channel_id}/items",
+    # 上传: multipart 表单 channel_id / ai_subtitle / file，返回 JSON {"success": true}
+    "upload_path": "/Ting/api/upload",
+    "timeout_s": 1800,
+}
+
+MULTIPART_BLOCK = 1024 * 1024
+
+
+class MultipartStream:
+    """
+    流式 multipart/form-data 请求体：文件部分边读边发，不会整个读进内存。
+    提供 read() 和 len，requests 会据此设置 Content-Length 并分块发送。
+    """
+
+    def __init__(self, fields, file_field, file_path):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+
+        head = []
+        for key, value in fields.items():
+            head.append(
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{key}"\r\n\r\n'
+                f"{value}\r\n"
+            )
+        filename = os.path.basename(file_path)
+        mime = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        head.append(
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f"Content-Type: {mime}\r\n\r\n"
+        )
+        self._head = "".join(head).encode("utf-8")
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._file_path = file_path
+        self.len = len(self._head) + os.path.getsize(file_path) + len(self._tail)
+        self._parts = None
+
+    def __len__(self):
+        return self.len
+
+    def _iter_parts(self):
+        yield self._head
+        with open(self._file_path, "rb") as f:
+            while True:
+                block = f.read(MULTIPART_BLOCK)
+                if not block:
+                    break
+                yield block
+        yield self._tail
+
+    def __iter__(self):
+        return self._iter_parts()
+
+    def read(self, size=-1):
+        if self._parts is None:
+            self._parts = self._iter_parts()
+            self._pending = b""
+        out = [self._pending]
+        have = len(self._pending)
+        while size < 0 or have < size:
+            block = next(self._parts, None)
+            if block is None:
+                break
+            out.append(block)
+            have += len(block)
+        data = b"".join(out)
+        if size >= 0:
+            data, self._pending = data[:size], data[size:]
+        else:
+            self._pending = b""
+        return data
+
+
+def load_auth_cookies(session, auth_file):
+    """把 Playwright storage_state (auth.json) 里的 cookie 装进 requests.Session"""
+    with open(auth_file, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    for cookie in state.get("cookies", []):
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie.get("domain", ""),
+            path=cookie.get("path", "/"),
+        )
+
+
+class HttpUploader(Uploader):
+    """不开浏览器，直接调用后台接口上传"""
+
+    name = "http"
+
+    def __init__(self, auth_file, pacer, options=None):
+        super().__init__(auth_file, pacer)
+        self.options = dict(DEFAULT_HTTP_UPLOAD)
+        self.options.update(options or {})
+        self.session = None
+        self._channels = {}
+        self._channel_id = None
+
+    def _url(self, key, **kwargs):
+        return urljoin(self.options["base_url"], self.options[key].format(**kwargs))
+
+    def _request(self, method, url, **kwargs):
+        """发请求并把耗时 / 状态报告给 Pacer"""
+        import requests
+
+        kwargs.setdefault("timeout", 30)
+        try:
+            resp = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self.pacer.record_error()
+            raise
+        self.pacer.record_response(
+            resp.status_code, resp.elapsed.total_seconds() * 1000
+        )
+        resp.raise_for_status()
+        return resp
+
+    def open(self):
+        import requests
+
+        if not self.options["base_url"]:
+            raise RuntimeError(
+                "HTTP 上传后端是实验性的，接口路径只是占位 (见 fake_eudic_server.py)；"
+                "请在 config.yaml 的 http_upload.base_url 里显式配置接口地址"
+            )
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "Mozilla/5.0 eudic-auto-uploader"
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        load_auth_cookies(self.session, self.auth_file)
+
+        print(f"🌍 连接后台接口 {self.options['base_url']} ...")
+        channels = self._request("GET", self._url("channels_path")).json()
+        self._channels = {c["name"]: c["id"] for c in channels}
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def select_channel(self, channel_name):
+        # 和网页点击一样按“包含”匹配栏目名，优先完全一致
+        if channel_name in self._channels:
+            self._channel_id = self._channels[channel_name]
+            return True
+        for name, channel_id in self._channels.items():
+            if channel_name in name:
+                self._channel_id = channel_id
+                return True
+        return False
+
+    def remote_titles(self):
+        url = self._url("items_path", channel_id=self._channel_id)
+        return [item.get("title", "") for item in self._request("GET", url).json()]
+
+    def _post_file(self, path, ai_subtitle):
+        fname = os.path.basename(path)
+        body = MultipartStream(
+            {"channel_id": self._channel_id, "ai_subtitle": int(ai_subtitle)},
+            "file",
+            path,
+        )
+        print(f"      ⬆️  POST {fname} ({body.len / 1024 / 1024:.1f} MB)")
+        started = time.time()
+        with tracing.span("upload_wait", file=fname, bytes=body.len) as sp:
+            resp = self._request(
+                "POST",
+                self._url("upload_path"),
+                data=body,
+                headers={"Content-Type": body.content_type},
+                timeout=self.options["timeout_s"],
+            )
+            result = resp.json()
+            if not result.get("success"):
+                self.pacer.record_error()
+                sp["outcome"] = "failed"
+                raise UploadFailed(fname)
+        elapsed = max(time.time() - started, 1e-6)
+        print(f"      ✅  上传成功 ({body.len / 1024 / 1024 / elapsed:.1f} MB/s)")
+
+    def upload_single(self, path):
+        self._post_file(path, ai_subtitle=True)
+
+    def upload_zip(self, path):
+        self._post_file(path, ai_subtitle=False)
+
+
+def create_uploader(
+    backend, auth_file, pacer, headless=True, http_options=None, browser_service=None
+):
+    """按 config.yaml 的 upload_backend 创建上传后端，未知取值回退到 Playwright"""
+    if backend == "http":
+        return HttpUploader(auth_file, pacer, http_options)
+    if backend not in (None, "", "playwright"):
+        print(f"⚠️  未知的 upload_backend: {backend}，使用 playwright")
+    return PlaywrightUploader(
+        auth_file, pacer, headless=headless, browser_service=browser_service
+    )